@@ -1,12 +1,16 @@
 # admin_window.py
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
-    QLineEdit, QTextEdit, QPushButton, QMessageBox, QToolBar,QGroupBox,QListWidget
+    QLineEdit, QTextEdit, QPushButton, QMessageBox, QToolBar,QGroupBox,QTableView,
+    QAbstractItemView, QHeaderView
 )
 from PyQt6.QtGui import QIcon
-from PyQt6.QtCore import QSize, Qt, pyqtSignal
+from PyQt6.QtCore import QSize, Qt, QTimer, pyqtSignal
 from api_client import APIClient
-from database import Database
+from search_cache import PrefixSearchCache
+from task_model import TaskFilterProxyModel, TaskTableModel
+from user_directory import UserDirectory
+from workers import api_runner
 
 class SidebarTab(QWidget):
     clicked = pyqtSignal()
@@ -64,10 +68,15 @@ class SidebarTab(QWidget):
         self.clicked.emit()
 
 class AdminWindow(QMainWindow):
+    SEARCH_DEBOUNCE_MS = 250
+    SEARCH_LIMIT = 200
+
     def __init__(self):
         super().__init__()
         self.api = APIClient()  # Uses the API client instance
-        self.db = Database()
+        self.runner = api_runner()  # Runs API calls off the UI thread
+        # One fetch of the user list backs every user picker in the window.
+        self.user_directory = UserDirectory(self.api, self.runner, self)
         self.setWindowTitle("Admin Dashboard")
         self.resize(500, 500)
 
@@ -120,6 +129,15 @@ class AdminWindow(QMainWindow):
                 background-color: #347cdc;  /* A strong blue when selected */
                 color: white;
             }
+            QTableView {
+                border: 1px solid #ccc;
+                border-radius: 8px;
+                background-color: #f0f0f0;
+                color: #333;
+                font-size: 14px;
+                selection-background-color: #347cdc;
+                selection-color: white;
+            }
             QPushButton {
                 background-color: #4997e8;
                 border: 1px solid #4997e8;
@@ -195,8 +213,7 @@ class AdminWindow(QMainWindow):
         user_label.setStyleSheet("font-size: 14px;")
         self.user_combo = QComboBox()
         self.user_combo.setStyleSheet("QComboBox { padding: 4px; }")
-        users = self.api.user_with_tasks()
-        self.user_combo.addItems(users)
+        self.user_combo.setModel(self.user_directory)
         user_layout.addWidget(user_label)
         user_layout.addWidget(self.user_combo)
         assign_layout.addLayout(user_layout)
@@ -225,45 +242,6 @@ class AdminWindow(QMainWindow):
         assign_button.clicked.connect(self.assign_task)
         assign_layout.addWidget(assign_button)
         
-        # --- Panel for "Manage User Roles" ---
-        self.roles_panel = QWidget()
-        roles_layout = QVBoxLayout()
-        roles_layout.setContentsMargins(0,0,0,0)
-        roles_layout.setSpacing(10)
-        self.roles_panel.setLayout(roles_layout)
-        
-        manage_header_label = QLabel("Manage User")
-        manage_header_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #2d2d2d;")
-        roles_layout.addWidget(manage_header_label)
-        
-        # Role: Select User.
-        role_user_layout = QHBoxLayout()
-        role_user_label = QLabel("Select User:")
-        role_user_label.setStyleSheet("font-size: 14px;")
-        self.role_user_combo = QComboBox()
-        self.role_user_combo.setStyleSheet("QComboBox { padding: 4px; }")
-        self.role_user_combo.addItems(users)
-        role_user_layout.addWidget(role_user_label)
-        role_user_layout.addWidget(self.role_user_combo)
-        roles_layout.addLayout(role_user_layout)
-        
-        # Role: Select Role.
-        role_layout = QHBoxLayout()
-        role_label = QLabel("Select Role:")
-        role_label.setStyleSheet("font-size: 14px;")
-        self.role_combo = QComboBox()
-        self.role_combo.setStyleSheet("QComboBox { padding: 4px; }")
-        self.role_combo.addItems(["user", "admin"])
-        role_layout.addWidget(role_label)
-        role_layout.addWidget(self.role_combo)
-        roles_layout.addLayout(role_layout)
-        
-        # Update Role Button.
-        update_role_button = QPushButton("Update Role")
-        update_role_button.setStyleSheet("margin-top: 5px;")
-        update_role_button.clicked.connect(self.update_role)
-        roles_layout.addWidget(update_role_button)
-                
         # --- Panel for "Manage User Roles" ---
         self.roles_panel = QWidget()
         roles_layout = QVBoxLayout()
@@ -281,7 +259,7 @@ class AdminWindow(QMainWindow):
         role_user_label.setStyleSheet("font-size: 14px;")
         self.role_user_combo = QComboBox()
         self.role_user_combo.setStyleSheet("QComboBox { padding: 4px; }")
-        self.role_user_combo.addItems(users)
+        self.role_user_combo.setModel(self.user_directory)
         role_user_layout.addWidget(role_user_label)
         role_user_layout.addWidget(self.role_user_combo)
         roles_layout.addLayout(role_user_layout)
@@ -314,7 +292,7 @@ class AdminWindow(QMainWindow):
         delete_user_label.setStyleSheet("font-size: 14px;")
         self.delete_user_combo = QComboBox()
         self.delete_user_combo.setStyleSheet("QComboBox { padding: 4px; }")
-        self.delete_user_combo.addItems(users)
+        self.delete_user_combo.setModel(self.user_directory)
         delete_user_layout_inner.addWidget(delete_user_label)
         delete_user_layout_inner.addWidget(self.delete_user_combo)
         delete_user_layout.addLayout(delete_user_layout_inner)
@@ -348,12 +326,42 @@ class AdminWindow(QMainWindow):
         self.task_search_button = QPushButton("Search")
         self.task_search_button.clicked.connect(self.perform_task_search)
         search_layout.addWidget(self.task_search_button)
+
+        # Search as you type: wait for a pause in typing, then answer from the
+        # cache when possible and only ask the server when it can't.
+        self.search_cache = PrefixSearchCache()
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.perform_live_search)
+        self.task_search_username_field.textChanged.connect(self.search_timer.start)
+        self.task_search_title_field.textChanged.connect(self.search_timer.start)
         
         layout.addLayout(search_layout)
 
-        # List widget to display tasks.
-        self.task_list = QListWidget()
-        layout.addWidget(self.task_list)
+        # Filter over the rows loaded so far.
+        self.task_filter_field = QLineEdit()
+        self.task_filter_field.setPlaceholderText("Filter loaded tasks...")
+        layout.addWidget(self.task_filter_field)
+
+        # Table of tasks; rows are fetched page by page as the view scrolls.
+        self.task_model = TaskTableModel(self.api, self.runner, parent=self)
+        self.task_model.page_loaded.connect(self.on_task_page_loaded)
+        self.task_model.load_failed.connect(
+            lambda error: QMessageBox.critical(self, "Error", f"Failed to load tasks: {error}")
+        )
+        self.task_proxy = TaskFilterProxyModel(self)
+        self.task_proxy.setSourceModel(self.task_model)
+        self.task_filter_field.textChanged.connect(self.task_proxy.setFilterFixedString)
+
+        self.task_view = QTableView()
+        self.task_view.setModel(self.task_proxy)
+        self.task_view.setSortingEnabled(True)
+        self.task_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.task_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.task_view.verticalHeader().hide()
+        self.task_view.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.task_view)
 
         # Buttons for deleting and refreshing tasks.
         btn_layout = QHBoxLayout()
@@ -375,6 +383,12 @@ class AdminWindow(QMainWindow):
         self.roles_panel.hide()
         self.manage_task_panel.hide()
 
+        # Fill the user pickers once the window is up instead of before it appears.
+        self.user_directory.load_failed.connect(
+            lambda error: QMessageBox.critical(self, "Error", f"Failed to load users: {error}")
+        )
+        self.user_directory.load()
+
     def show_assign_panel(self):
         self.assign_panel.show()
         self.roles_panel.hide()
@@ -398,7 +412,15 @@ class AdminWindow(QMainWindow):
         if not title or not description:
             QMessageBox.warning(self, "Input Error", "Please enter both a task title and a description.")
             return
-        if self.api.assign_task(user, title, description):
+        self.runner.submit(
+            ("assign_task", user, title), self.api.assign_task, user, title, description,
+            on_result=lambda ok: self.on_task_assigned(ok, user),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to assign task: {e}"),
+        )
+
+    def on_task_assigned(self, ok, user):
+        if ok:
+            self.search_cache.clear()
             QMessageBox.information(self, "Success", f"Task assigned to {user}!")
             self.task_title.clear()
             self.task_description.clear()
@@ -408,11 +430,18 @@ class AdminWindow(QMainWindow):
     def update_role(self):
         user = self.role_user_combo.currentText()
         new_role = self.role_combo.currentText()
-        try:
-            self.api.update_user_role(user, new_role)
+        self.runner.submit(
+            ("update_role", user), self.api.update_user_role, user, new_role,
+            on_result=lambda ok: self.on_role_updated(ok, user, new_role),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to update role: {str(e)}"),
+        )
+
+    def on_role_updated(self, ok, user, new_role):
+        if ok:
+            self.user_directory.set_role(user, new_role)
             QMessageBox.information(self, "Success", f"{user}'s role updated to {new_role}!")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to update role: {str(e)}")
+        else:
+            QMessageBox.critical(self, "Error", f"Failed to update {user}'s role.")
 
     def delete_user(self):
         user = self.delete_user_combo.currentText()  # Use the correct combo box
@@ -423,17 +452,22 @@ class AdminWindow(QMainWindow):
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, 
                                     QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.api.delete_user(user)
-                QMessageBox.information(self, "Success", f"{user} was deleted.")
-                self.refresh_user_list()  # Refresh combo box after deletion
-            except Exception as e:
-                QMessageBox.critical(self, f"Action Failed", "Please try again later {e}.")
+            self.runner.submit(
+                ("delete_user", user), self.api.delete_user, user,
+                on_result=lambda ok: self.on_user_deleted(ok, user),
+                on_error=lambda e: QMessageBox.critical(self, "Action Failed", f"Please try again later {e}."),
+            )
+
+    def on_user_deleted(self, ok, user):
+        if not ok:
+            QMessageBox.critical(self, "Action Failed", f"Could not delete {user}.")
+            return
+        self.user_directory.remove_user(user)  # Every picker drops the user at once
+        QMessageBox.information(self, "Success", f"{user} was deleted.")
 
     def refresh_user_list(self):
-        self.role_user_combo.clear()
-        users = self.api.user_with_tasks()
-        self.role_user_combo.addItems(users)
+        """Reload the user directory from the backend."""
+        self.user_directory.load()
 
     def perform_task_search(self):
         """Search for tasks based on the provided username and optional task title."""
@@ -443,79 +477,106 @@ class AdminWindow(QMainWindow):
         if not username:
             QMessageBox.warning(self, "Input Error", "Please enter a username to search for tasks.")
             return
-        
-        # Call the API method with both username and title.
-        tasks = self.api.search_task(username, title)
-        self.task_list.clear()
-        
-        if not tasks:
-            QMessageBox.information(self, "Search Results", f"No tasks found for user '{username}' with title containing '{title}'.")
+
+        self.search_timer.stop()
+        # The button matches any part of the title, so "port" finds "Report";
+        # only search-as-you-type matches word prefixes.
+        self.runner.submit_latest(
+            "task_search", self.fetch_title_matches, username, title,
+            on_result=lambda tasks: self.show_search_results(tasks, username, title),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Search failed: {e}"),
+        )
+
+    def perform_live_search(self):
+        """Search while typing; stays quiet about empty input and empty results."""
+        username = self.task_search_username_field.text().strip()
+        if username:
+            self.run_task_search(username, self.task_search_title_field.text().strip())
+
+    def run_task_search(self, username, title):
+        cached = self.search_cache.get(username, title)
+        if cached is not None:
+            self.runner.cancel("task_search")  # An older server search would overwrite this
+            self.show_search_results(cached, username, title, interactive=False)
             return
 
-        for task in tasks:
-            if isinstance(task, dict):
-                assigned_user = task.get("username", "Unknown")
-                task_title = task.get("title", "Unknown")
-                description = task.get("description", "No Description")
-                status = task.get("status", "Pending")
-                item_text = f"{assigned_user} - {task_title}: {description} (Status: {status})"
-            else:
-                item_text = task
-            self.task_list.addItem(item_text)
-            
+        # A newer search makes the results of any older one irrelevant.
+        self.runner.submit_latest(
+            "task_search", self.fetch_search_results, username, title,
+            on_result=lambda result: self.on_search_fetched(result, username, title),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Search failed: {e}"),
+        )
+
+    def fetch_title_matches(self, username, title):
+        """Runs on a worker thread. Tasks of ``username`` whose title contains ``title``."""
+        result = self.api.search_task(username, title)
+        return result["task"] if result else []
+
+    def fetch_search_results(self, username, title):
+        """Runs on a worker thread. Returns (tasks, whether the list is complete)."""
+        # Titles are matched word by word against the full-text index; without
+        # a title every task of the user is listed.
+        if title:
+            tasks = self.api.full_text_search(title, username, limit=self.SEARCH_LIMIT)
+            return tasks, len(tasks) < self.SEARCH_LIMIT
+        result = self.api.search_task(username, title)
+        return (result["task"] if result else []), True
+
+    def on_search_fetched(self, result, username, title):
+        tasks, complete = result
+        self.search_cache.put(username, title, tasks, complete)
+        self.show_search_results(tasks, username, title, interactive=False)
+
+    def show_search_results(self, tasks, username, title, interactive=True):
+        self.task_model.set_tasks(tasks, default_username=username)
+        
+        if not tasks and interactive:
+            QMessageBox.information(self, "Search Results", f"No tasks found for user '{username}' with title containing '{title}'.")
 
     def load_all_tasks(self):
-        self.task_list.clear()
-        # Fetch all tasks; you might call a dedicated API method here.
-        tasks = self.api.user_with_tasks()  # Adjust if needed.
-        if not tasks:
+        # A refresh supersedes a search still in flight.
+        self.runner.cancel("task_search")
+        self.search_timer.stop()
+        self.task_model.reset()
+
+    def on_task_page_loaded(self, count):
+        if count == 0 and self.task_model.rowCount() == 0:
             QMessageBox.information(self, "No Tasks", "No tasks found.")
-            return
-        for task in tasks:
-            if isinstance(task, dict):
-                assigned_user = task.get("username", "Unknown")
-                task_title = task.get("title", "Unknown")
-                description = task.get("description", "No Description")
-                status = task.get("status", "Pending")
-                item_text = f"{assigned_user} - {task_title}: {description} (Status: {status})"
-            else:
-                item_text = task
-            self.task_list.addItem(item_text)
 
     def delete_selected_task(self):
-        selected_items = self.task_list.selectedItems()
-        if not selected_items:
+        selected_rows = self.task_view.selectionModel().selectedRows()
+        if not selected_rows:
             QMessageBox.warning(self, "Selection Error", "Please select a task to delete.")
             return
-        selected_item = selected_items[0]
 
-        task_data = selected_item.data(Qt.UserRole)
-        if not task_data:
-            QMessageBox.critical(self, "Error, Task is missing. Cannot proceed")
-            return
-        
-        username = task_data.get("username")
-        task_id = task_data.get("task_id")
-        task_title = task_data.get("title")
+        task = self.task_proxy.data(selected_rows[0], TaskTableModel.TaskRole)
+        task_id, task_title = task.task_id, task.title
 
-        if not task_id or username: 
-            QMessageBox.critical(self, "Error, Incompelete task data. Cannot delete.")
+        if not task_title:
+            QMessageBox.critical(self, "Error", "Incomplete task data. Cannot delete.")
             return
         
-        comfrimation = QMessageBox.question(
+        confirmation = QMessageBox.question(
             self,
-            "Comfrime Delete",
+            "Confirm Delete",
             f"Are you sure you want to delete task {task_title}?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
 
-        if comfrimation == QMessageBox.StandardButton.Yes:
-            try: 
-                success = self.api.delete_task(task_id)
-                if success: 
-                    QMessageBox.information(self,"Success","Task deleted succesfully!")
-                    self.load_all_tasks()
-                else: 
-                    QMessageBox.critical(self,"Error", "API detection failed. Please try again")
-            except Exception as e: 
-                QMessageBox.critical(self, f"Error is {str(e)}")
\ No newline at end of file
+        if confirmation == QMessageBox.StandardButton.Yes:
+            self.runner.submit(
+                ("delete_task", task_id, task_title), self.api.delete_task, task_title, task_id,
+                on_result=lambda success: self.on_task_deleted(success, task_id, task_title),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Error is {str(e)}"),
+            )
+
+    def on_task_deleted(self, success, task_id, task_title):
+        if success:
+            self.search_cache.clear()
+            if task_id is not None:
+                self.task_model.remove_task(task_id)
+            else:
+                self.load_all_tasks()
+            QMessageBox.information(self, "Success", f"Task {task_title} deleted successfully!")
+        else:
+            QMessageBox.critical(self, "Error", "API deletion failed. Please try again")
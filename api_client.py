@@ -1,103 +1,361 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
 import requests
-from PyQt6.QtWidgets import QMessageBox
-import bcrypt
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from log_config import SAMPLED
+from replica import Replica, replica_path
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts in seconds for every call unless overridden.
+DEFAULT_TIMEOUT = (3.05, 15)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(base_url):
+    """Return the keep-alive session shared by every client of ``base_url``."""
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            retry = Retry(
+                total=3,
+                backoff_factor=0.3,                        # 0.3s, 0.6s, 1.2s
+                status_forcelist=(502, 503, 504),
+                # Never replay a POST, or a DELETE: deleting by title again
+                # would remove another task with the same title.
+                allowed_methods={"GET", "PUT"},
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[base_url] = session
+        return session
+
+
+class LatencyStats:
+    """Per-endpoint call counts and latencies, shared by every client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, seconds, failed=False):
+        with self._lock:
+            stats = self._endpoints.setdefault(
+                endpoint, {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: dict(stats, avg_seconds=stats["total_seconds"] / stats["calls"])
+                for endpoint, stats in self._endpoints.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+latency = LatencyStats()
+
+
+class APIError(Exception):
+    """The backend rejected a request."""
+
 
 class APIClient:
-    def __init__(self, base_url="http://127.0.0.1:8000"):
+    # Responses kept for ETag revalidation; each search query is its own entry.
+    ETAG_CACHE_SIZE = 64
+
+    def __init__(self, base_url="http://127.0.0.1:8000", timeout=DEFAULT_TIMEOUT):
         self.base_url = base_url
+        self.timeout = timeout
+        # Shared, so one login covers every window's client.
+        self.session = get_session(base_url)
+        self.replica = Replica()
+        self._etags = OrderedDict()  # (path, params) -> (etag, data) of the last 200 response, LRU first
+        self._etags_lock = threading.Lock()  # Calls come from worker threads
+
+    def _request(self, method, path, endpoint=None, **kwargs):
+        """Send a request on the pooled session and record its latency under ``endpoint``."""
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = endpoint or f"{method} {path}"
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        except requests.RequestException:
+            latency.record(endpoint, time.perf_counter() - start, failed=True)
+            raise
+        latency.record(endpoint, time.perf_counter() - start, failed=response.status_code >= 500)
+        return response
+
+    def _get_json(self, path, endpoint=None, params=None):
+        """GET a JSON resource, revalidating the last copy with its ETag.
+
+        Returns (response, data).  ``data`` is None unless the request
+        succeeded; a 304 means the copy from last time is still current.
+        """
+        key = (path, tuple(sorted((params or {}).items())))
+        with self._etags_lock:
+            cached = self._etags.get(key)
+            if cached:
+                self._etags.move_to_end(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self._request("GET", path, endpoint=endpoint, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return response, cached[1]
+        if response.status_code != 200:
+            return response, None
+
+        data = response.json()
+        if "ETag" in response.headers:
+            with self._etags_lock:
+                self._etags[key] = (response.headers["ETag"], data)
+                self._etags.move_to_end(key)
+                while len(self._etags) > self.ETAG_CACHE_SIZE:
+                    self._etags.popitem(last=False)
+        return response, data
+
+    def latency_stats(self):
+        """Call counts and latencies per endpoint since startup."""
+        return latency.snapshot()
 
     def login(self, username, password):
-        """Check user credentials and return role if valid."""
-        response = requests.get(f"{self.base_url}/users/", params={"username": username, "password": password})
+        """Check user credentials, start a session and return role if valid."""
+        response = self._request("POST", "/login", json={"username": username, "password": password})
         
         if response.status_code == 200:
             user_data = response.json()
-            print(f"API response: {user_data}")  # Debugging to see the role returned
-            
+
             # No need to compare passwords on the frontend, as the backend already handled this
             if "role" in user_data:
+                self.session.headers["Authorization"] = f"Bearer {user_data['token']}"
+                # Each user's replica, and any changes they made offline, lives in its own file.
+                self.replica = Replica(replica_path(self.base_url, username))
+                self._etags.clear()
+                logger.debug("Logged in as %s with role %s", username, user_data["role"])
                 return user_data["role"]  # Return the role only if the backend successfully authenticated
             else:
-                print("Role not found in the response.")
+                logger.warning("Login response for %s has no role", username)
                 return None  # If role is not found, return None (authentication failed)
         else:
-            print(f"API Error: {response.status_code} - {response.text}")
+            logger.warning("Login failed for %s: %s %s", username, response.status_code, response.text)
             return None  # User not found or other error
         
 
+    def logout(self):
+        """Forget the session token."""
+        self.session.headers.pop("Authorization", None)
+        self.replica = Replica()
+        self._etags.clear()
+
+    def refresh(self):
+        """Send queued changes and bring the replica up to date.
+
+        Returns False instead of raising when the backend can't be reached;
+        the replica then still serves the last known state.
+        """
+        try:
+            self.flush()
+            self.sync()
+        except (requests.ConnectionError, requests.Timeout):
+            return False
+        return True
+
+    def flush(self, batch_size=100):
+        """Send the replica's queued status changes in batches. Returns how many were sent."""
+        sent = 0
+        while True:
+            updates = self.replica.pending(batch_size)
+            if not updates:
+                return sent
+            response = self._request("PUT", "/tasks/status/batch", json={"updates": updates})
+            response.raise_for_status()
+            self.replica.resolve(updates, response.json()["results"])
+            sent += len(updates)
+
+    def sync(self, limit=1000):
+        """Bring ``self.replica`` up to date. Returns how many tasks and users changed."""
+        changed = 0
+        while True:
+            response = self._request("GET", "/sync", params={"since": self.replica.version, "limit": limit})
+            response.raise_for_status()
+            changes = response.json()
+            changed += self.replica.apply(changes)
+            if not changes["more"]:
+                return changed
+
     def user_with_tasks(self):
         """Fetch all users with tasks."""
-        url = f"{self.base_url}/users/tasks/"
-        print(f"Fetching data from {url}")  # Debugging
-        response = requests.get(url)
-
-        if response.status_code == 200:
-            data = response.json()
-            print("Response JSON:", data)  # Debugging line
+        response, data = self._get_json("/users/tasks/")
 
+        if data is not None:
             users_list = data.get("users with tasks", [])
             
             if not isinstance(users_list, list):
-                print("Unexpected data format:", users_list)
+                logger.warning("Unexpected users with tasks format: %.200r", users_list)
                 return []
+            logger.debug("Fetched %d users with tasks", len(users_list), extra=SAMPLED)
             
             return [user.get("username", "Unknown") if isinstance(user, dict) else user for user in users_list]
 
-        print(f"Failed to fetch data. Status Code: {response.status_code}, Response: {response.text}")
+        logger.warning("Failed to fetch users with tasks: %s %s", response.status_code, response.text)
         return []
 
 
 
+    def list_users(self):
+        """Fetch every user's id, name and role.
+
+        Falls back to the replica's copy of the directory when the backend
+        can't be reached.
+        """
+        try:
+            response, data = self._get_json("/users/directory")
+        except (requests.ConnectionError, requests.Timeout):
+            if not self.replica.version:
+                raise APIError("The server is unreachable and no users are cached.")
+            return self.replica.users()
+        if data is None:
+            response.raise_for_status()
+            raise APIError(f"Failed to fetch users. Error: {response.text}")
+        return data["users"]
+
+    def list_tasks(self, cursor=None, limit=100):
+        """Fetch one page of all tasks. Returns (tasks, next_cursor)."""
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = self._request("GET", "/tasks/all", params=params)
+        if response.status_code == 200:
+            data = response.json()
+            return data["tasks"], data["next_cursor"]
+        return [], None
+
+    def iter_all_tasks(self, chunk_size=500):
+        """Yield every task, streamed from the backend as NDJSON."""
+        params = {"stream": "true", "limit": chunk_size}
+        with self._request("GET", "/tasks/all", endpoint="GET /tasks/all?stream", params=params, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def open_event_stream(self, topic=None, since=None):
+        """Open the Server-Sent Events stream of task changes; read it with ``iter_events``.
+
+        Pass the last seen ``seq`` as ``since`` to resume where a previous
+        stream stopped.  The backend sends a keep-alive every few seconds, so a
+        silent connection times out instead of hanging.
+        """
+        params = {key: value for key, value in [("topic", topic), ("since", since)] if value is not None}
+        response = self._request("GET", "/events", params=params, stream=True,
+                                 timeout=(DEFAULT_TIMEOUT[0], 60))
+        if response.status_code != 200:
+            response.close()
+            response.raise_for_status()
+        return response
+
+    @staticmethod
+    def iter_events(response):
+        """Yield the events of an open event stream as they arrive."""
+        data = []
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                if line.startswith("data:"):
+                    data.append(line[5:].strip())
+            elif data:  # A blank line ends the event
+                yield json.loads("\n".join(data))
+                data = []
+
+    def stream_events(self, topic=None, since=None):
+        """Yield task change events until the stream ends."""
+        with self.open_event_stream(topic, since) as response:
+            yield from self.iter_events(response)
+
     def assign_task(self, username, title, description):
         """Assign a task to a user."""
         data = {"title": title, "description": description}
-        response = requests.post(f"{self.base_url}/tasks/?username={username}", json=data)
+        response = self._request("POST", "/tasks/", params={"username": username}, json=data)
         return response.status_code == 200
 
-    def get_user_tasks(self, username):
-        """Fetch tasks assigned to a user."""
-        response = requests.get(f"{self.base_url}/tasks/{username}/")
+    def assign_tasks_bulk(self, tasks):
+        """Assign many tasks in one request.
+
+        ``tasks`` is a list of dicts with username, title, description and an
+        optional status.  Returns the per-task results, or None on failure.
+        """
+        response = self._request("POST", "/tasks/bulk", json={"tasks": tasks}, timeout=(DEFAULT_TIMEOUT[0], 120))
         if response.status_code == 200:
-            return response.json().get("task", [])
-        return []
+            return response.json()["results"]
+        return None
+
+    def get_user_tasks(self, username):
+        """Tasks assigned to a user, from the replica once it is brought up to date."""
+        self.refresh()
+        return self.replica.tasks(username)
 
     def update_task_status(self, task_id, new_status):
-        """Update the status of a task."""
-        response = requests.put(f"{self.base_url}/tasks/{task_id}/status", params={"new_status": new_status})
+        """Update the status of a task.
+
+        Tasks in the replica are updated locally and the change is queued for
+        ``flush``; anything else goes straight to the backend.
+        """
+        if self.replica.queue_status(task_id, new_status):
+            return True
+        response = self._request("PUT", f"/tasks/{task_id}/status", endpoint="PUT /tasks/{task_id}/status",
+                                 params={"new_status": new_status})
         return response.status_code == 200
 
     def update_user_role(self, user, new_role):
         """Update the role of a user."""
-        response = requests.put(f"{self.base_url}/users/{user}/role", json={"role": new_role})
+        response = self._request("PUT", f"/users/{user}/role", endpoint="PUT /users/{username}/role",
+                                 json={"role": new_role})
         return response.status_code == 200
 
     def delete_user(self, user):
         """Delete a user."""
-        response = requests.delete(f"{self.base_url}/users/{user}/")
+        response = self._request("DELETE", f"/users/{user}/", endpoint="DELETE /users/{username}/")
         return response.status_code == 200
 
-    def delete_task(self, task_title):
-        """Delete a task."""
-        response = requests.delete(f"{self.base_url}/tasks/{task_title}/")
+    def delete_task(self, task_title, task_id=None):
+        """Delete a task; pass its ``task_id`` too, so another task with the same title is never hit."""
+        params = {"task_id": task_id} if task_id is not None else None
+        response = self._request("DELETE", f"/tasks/{task_title}/", endpoint="DELETE /tasks/{task_title}/",
+                                 params=params)
         return response.status_code == 200
     
     def insert_user(self,username, password, role):
         """Function to insert a new user via the FastAPI backend"""
         
-        url = f"{self.base_url}/users/"
         data = {
             "username": username,
             "password": password,
             "role": role
         }
-        headers = {"Content-Type": "application/json"}
 
-        response = requests.post(url, json=data, headers=headers)  # Use `json=` instead of `params=`
+        response = self._request("POST", "/users/", json=data)  # Use `json=` instead of `params=`
 
         if response.status_code == 200:
             return response.json()
         else:
-            QMessageBox.critical(None, "Error", f"Failed to add user {username}. Error: {response.text}")
+            # Raised rather than shown here: this may run on a worker thread.
+            raise APIError(f"Failed to add user {username}. Error: {response.text}")
     
     
     def search_task(self, username, title):
@@ -105,20 +363,28 @@ class APIClient:
         Function to get tasks assigned to a specific user via the FastAPI backend.
         Optionally, if a task title is provided, it will be used to search tasks by name (partial match).
         """
-        url = f"{self.base_url}/tasks/"
-        
         # If a task title is given, include it as a query parameter:
         params = {key: value for key, value in [("title", title), ("username", username)] if value}
 
-        response = requests.get(url, params=params)
+        response, tasks = self._get_json("/tasks/", params=params)
         
         # Check if the request was successful
-        if response.status_code == 200:
-            tasks = response.json()
-            print(f"Tasks for {username}:")
-            for task in tasks["task"]:
-                print(f" - {task['title']}: {task['description']} (Status: {task['status']})")
+        if tasks is not None:
+            logger.debug("Found %d tasks for %s", len(tasks["task"]), username, extra=SAMPLED)
             return tasks
         else:
-            print(f"Failed to retrieve tasks for {username}. Error: {response.text}")
-            return None
\ No newline at end of file
+            logger.warning("Failed to retrieve tasks for %s: %s", username, response.text)
+            return None
+
+    def full_text_search(self, query, username=None, limit=50):
+        """Search task titles and descriptions by word prefixes, best matches first."""
+        params = {"q": query, "limit": limit}
+        if username:
+            params["username"] = username
+
+        response, data = self._get_json("/tasks/", endpoint="GET /tasks/?q", params=params)
+        if data is not None:
+            return data.get("task", [])
+
+        logger.warning("Full-text search failed: %s", response.text)
+        return []
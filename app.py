@@ -4,8 +4,10 @@ from database import Database
 from login_window import LoginWindow
 from admin_window import AdminWindow
 from user_window import UserWindow
+from log_config import configure_logging
 
 def main():
+    configure_logging()
     db = Database()
     app = QApplication(sys.argv)
 
@@ -0,0 +1,75 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncDatabase:
+    """Run ``Database`` calls off the event loop.
+
+    SQLite in WAL mode lets readers run alongside each other and alongside a
+    single writer, but only one write transaction can be open at a time.  Reads
+    therefore go to a small pool of threads while every write is queued on one
+    dedicated writer thread, so writers never fight over the lock.
+    """
+
+    READ_METHODS = {
+        "check_user_credentials",
+        "get_user_auth",
+        "get_user_role",
+        "list_users",
+        "search_task",
+        "full_text_search",
+        "fetch_task_id",
+        "get_task",
+        "user_with_tasks",
+        "list_tasks_page",
+        "changes_since",
+    }
+
+    WRITE_METHODS = {
+        "insert_user",
+        "update_password",
+        "update_user_role",
+        "assign_task",
+        "assign_tasks_bulk",
+        "update_task_status",
+        "update_task_statuses",
+        "delete_user",
+        "delete_task",
+    }
+
+    def __init__(self, db, readers=4):
+        self.db = db
+        # Leave one pooled connection for the writer so it never waits on readers.
+        self.readers = max(1, min(readers, db.pool.max_size - 1))
+        self._read_executor = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="db-read")
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+    async def read(self, fn, *args, **kwargs):
+        """Run a read-only callable on the reader pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, self._in_context(fn, *args, **kwargs))
+
+    async def write(self, fn, *args, **kwargs):
+        """Run a callable that writes on the single writer thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._write_executor, self._in_context(fn, *args, **kwargs))
+
+    @staticmethod
+    def _in_context(fn, *args, **kwargs):
+        # Executors don't carry context variables over, so per-request state
+        # (such as the request's database time in metrics.py) would be lost.
+        return functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in self.READ_METHODS:
+            return functools.partial(self.read, getattr(self.db, name))
+        if name in self.WRITE_METHODS:
+            return functools.partial(self.write, getattr(self.db, name))
+        raise AttributeError(f"{type(self).__name__!s} has no database method {name!r}")
+
+    def shutdown(self, wait=True):
+        """Stop the executors once queued calls have finished."""
+        self._read_executor.shutdown(wait=wait)
+        self._write_executor.shutdown(wait=wait)
@@ -0,0 +1,4 @@
+"""Benchmarks for the backend. Run each module from the repository root, e.g.
+
+    python -m benchmarks.bench_passwords
+"""
@@ -0,0 +1,194 @@
+"""Throughput of the Database methods as the tasks table grows.
+
+Every method is run against an on-disk and an in-memory database seeded with
+each of ``--sizes`` tasks, reporting operations per second, the memory a
+call allocates (traced on a separate, shorter run) and the query plan of the
+SQL it issues.  The ``scaling`` column is the exponent k in time ~ size^k
+between the smallest and largest size: about 0 for methods that use an
+index, 1 for methods that read the whole table.
+
+    python -m benchmarks.bench_database --sizes 1000 100000 1000000
+    python -m benchmarks.bench_database --sizes 1000 10000 --storage memory --json db.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import database
+from database import Database
+from passwords import hash_password
+
+PASSWORD = "password"
+STATUSES = ("Pending", "In Progress", "Completed")
+
+# The SQL each method issues, as names of database.HOT_QUERIES or (sql, params).
+METHOD_QUERIES = {
+    "assign_task": ["user_id_by_name", "assign_task.duplicate_check"],
+    "search_task": ["search_task"],
+    "fetch_task_id": ["fetch_task_id"],
+    "update_task_status": [(database.UPDATE_STATUS_SQL, ("", 0))],
+    "delete_task": ["delete_task.lookup"],
+    "user_with_tasks": [(database.USERS_WITH_TASKS_SQL, ())],
+    "check_user_credentials": ["check_user_credentials"],
+}
+
+
+def seed(db, tasks, rng):
+    """Fill ``db`` with ``tasks`` tasks over one user per hundred tasks. Returns the usernames."""
+    stored = hash_password(PASSWORD, 4)
+    usernames = [f"user{i:06d}" for i in range(max(10, tasks // 100))]
+    with db.connection() as conn:
+        conn.executemany("INSERT INTO users (username, password, role) VALUES (?, ?, 'user')",
+                         [(username, stored) for username in usernames])
+        conn.executemany(
+            "INSERT INTO tasks (title, description, status, user_id) VALUES (?, ?, ?, ?)",
+            ((f"task {i}", f"description of task {i}", rng.choice(STATUSES), i % len(usernames) + 1)
+             for i in range(tasks)),
+        )
+    return usernames
+
+
+def operations(db, usernames, tasks, rng):
+    """method name -> function(i) that calls it once."""
+    def some_user():
+        return rng.choice(usernames)
+
+    def some_task():
+        i = rng.randrange(tasks)
+        return usernames[i % len(usernames)], f"task {i}"
+
+    return {
+        "assign_task": lambda i: db.assign_task(some_user(), f"bench {i}", "benchmark task"),
+        "search_task": lambda i: db.search_task(some_user(), "task 1"),
+        "fetch_task_id": lambda i: db.fetch_task_id(*some_task()),
+        "update_task_status": lambda i: db.update_task_status(rng.randrange(1, tasks + 1), rng.choice(STATUSES)),
+        # Removes the tasks assign_task added, so every size keeps its row count.
+        "delete_task": lambda i: db.delete_task(f"bench {i}"),
+        "user_with_tasks": lambda i: db.user_with_tasks(),
+        "check_user_credentials": lambda i: db.check_user_credentials(some_user(), PASSWORD),
+    }
+
+
+def measure(op, seconds, max_ops):
+    """Call ``op`` until the time budget or ``max_ops`` runs out. Returns (ops, ops per second)."""
+    ops = 0
+    start = time.perf_counter()
+    while ops < max_ops:
+        op(ops)
+        ops += 1
+        if time.perf_counter() - start >= seconds:
+            break
+    return ops, ops / (time.perf_counter() - start)
+
+
+def measure_allocations(op, calls, offset):
+    """Average peak bytes allocated by one call, and bytes still held after all of them."""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        peaks = []
+        for i in range(calls):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            op(offset + i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks), retained
+
+
+def query_plans(db, method):
+    """One line per statement: the EXPLAIN QUERY PLAN details of the SQL ``method`` runs."""
+    plans = []
+    with db.connection() as conn:
+        for query in METHOD_QUERIES[method]:
+            sql, params = database.HOT_QUERIES[query] if isinstance(query, str) else query
+            plans.append("; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)))
+    return plans
+
+
+def bench_size(storage, tasks, args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = ":memory:" if storage == "memory" else os.path.join(workdir, "bench.db")
+        db = Database(path)
+        try:
+            start = time.perf_counter()
+            usernames = seed(db, tasks, rng)
+            seeded = time.perf_counter() - start
+
+            results = {}
+            ops = operations(db, usernames, tasks, rng)
+            for method, op in ops.items():
+                if args.methods and method not in args.methods:
+                    continue
+                count, per_second = measure(op, args.seconds, args.max_ops)
+                peak, retained = measure_allocations(op, args.alloc_calls, offset=count)
+                results[method] = {
+                    "ops": count,
+                    "ops_per_sec": per_second,
+                    "alloc_peak_kib": peak / 1024,
+                    "alloc_retained_kib": retained / 1024,
+                    "plan": query_plans(db, method),
+                }
+        finally:
+            db.close()
+    return {"storage": storage, "tasks": tasks, "seed_seconds": seeded, "methods": results}
+
+
+def scaling(runs, storage, method):
+    """Exponent k in time per op ~ size^k between the smallest and largest size."""
+    points = [(run["tasks"], run["methods"][method]["ops_per_sec"])
+              for run in runs if run["storage"] == storage and method in run["methods"]]
+    if len(points) < 2:
+        return None
+    (small, small_rate), (large, large_rate) = min(points), max(points)
+    return math.log(small_rate / large_rate) / math.log(large / small)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--storage", choices=["disk", "memory"], nargs="+", default=["disk", "memory"])
+    parser.add_argument("--methods", nargs="+", choices=list(METHOD_QUERIES), help="only these methods")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time budget per method and size")
+    parser.add_argument("--max-ops", type=int, default=10_000, help="call limit per method and size")
+    parser.add_argument("--alloc-calls", type=int, default=5, help="calls traced for allocations")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    args = parser.parse_args()
+
+    runs = []
+    for storage in args.storage:
+        for tasks in sorted(args.sizes):
+            run = bench_size(storage, tasks, args)
+            runs.append(run)
+            print(f"\n{storage}, {tasks} tasks (seeded in {run['seed_seconds']:.1f}s)")
+            print(f"{'method':<24} {'ops/s':>10} {'peak KiB':>9} {'held KiB':>9}  plan")
+            for method, result in run["methods"].items():
+                print(f"{method:<24} {result['ops_per_sec']:>10.1f} {result['alloc_peak_kib']:>9.1f} "
+                      f"{result['alloc_retained_kib']:>9.1f}  {' | '.join(result['plan'])}")
+
+    print(f"\n{'scaling (k in time ~ size^k)':<30}" + "".join(f"{storage:>8}" for storage in args.storage))
+    summary = {}
+    for method in METHOD_QUERIES:
+        if args.methods and method not in args.methods:
+            continue
+        exponents = {storage: scaling(runs, storage, method) for storage in args.storage}
+        summary[method] = exponents
+        print(f"{method:<30}" + "".join(f"{k:>8.2f}" if k is not None else f"{'-':>8}"
+                                        for k in exponents.values()))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"runs": runs, "scaling": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
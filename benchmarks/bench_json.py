@@ -0,0 +1,150 @@
+"""Cost of serializing task listings, by serialization path.
+
+For each of ``--sizes`` tasks, the listing is read from a seeded in-memory
+database once and then serialized by every path:
+
+    encoder  FastAPI's default: jsonable_encoder, then json.dumps
+    stdlib   models.dumps straight from the Task objects
+    orjson   responses.orjson_dumps straight from the Task objects
+    stream   NDJSON chunks of --chunk tasks, as GET /tasks/all?stream=true sends
+
+Reported per path: median milliseconds per listing, throughput, peak memory
+allocated while serializing (traced on a separate run) and, for streaming,
+the time to the first chunk.  The query itself is timed too, for scale.
+
+    python -m benchmarks.bench_json --sizes 1000 10000 100000
+    python -m benchmarks.bench_json --payload users --json json.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.bench_database import seed
+from database import Database
+from models import dumps
+from responses import ndjson_chunk, orjson, orjson_dumps
+
+
+def load(payload, db, tasks):
+    """The listing as its route builds it, and the seconds the query took."""
+    start = time.perf_counter()
+    if payload == "users":
+        content = {"users with tasks": db.user_with_tasks()}
+    else:
+        content = {"tasks": db.list_tasks_page(limit=tasks), "next_cursor": None}
+    return content, time.perf_counter() - start
+
+
+def paths(chunk):
+    """name -> function(content) returning (bytes written, seconds to the first byte)."""
+    def whole(serialize):
+        def run(content):
+            start = time.perf_counter()
+            body = serialize(content)
+            return len(body), time.perf_counter() - start
+        return run
+
+    def stream(content):
+        items = next(iter(content.values()))
+        start = time.perf_counter()
+        first, size = None, 0
+        for i in range(0, len(items), chunk):
+            size += len(ndjson_chunk(items[i:i + chunk]))
+            if first is None:
+                first = time.perf_counter() - start
+        return size, first or 0.0
+
+    found = {
+        "encoder": whole(lambda content: json.dumps(jsonable_encoder(content)).encode()),
+        "stdlib": whole(lambda content: dumps(content).encode()),
+        "orjson": whole(orjson_dumps),
+        "stream": stream,
+    }
+    if orjson is None:
+        del found["orjson"]  # The stream path then measures the stdlib encoder
+    return found
+
+
+def measure(run, content, repeat):
+    """Median seconds per call, bytes written and median time to the first byte."""
+    times, firsts = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size, first = run(content)
+        times.append(time.perf_counter() - start)
+        firsts.append(first)
+    return statistics.median(times), size, statistics.median(firsts)
+
+
+def peak_allocated(run, content):
+    tracemalloc.start()
+    try:
+        run(content)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_size(tasks, args):
+    db = Database(":memory:")
+    try:
+        seed(db, tasks, random.Random(args.seed))
+        content, query_seconds = load(args.payload, db, tasks)
+    finally:
+        db.close()
+
+    results = {}
+    for name, run in paths(args.chunk).items():
+        if args.paths and name not in args.paths:
+            continue
+        seconds, size, first = measure(run, content, args.repeat)
+        results[name] = {
+            "ms": seconds * 1000,
+            "mb_per_sec": size / seconds / 1e6 if seconds else 0.0,
+            "first_byte_ms": first * 1000,
+            "peak_kib": peak_allocated(run, content) / 1024,
+            "bytes": size,
+        }
+    return {"tasks": tasks, "query_ms": query_seconds * 1000, "paths": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--payload", choices=["tasks", "users"], default="tasks",
+                        help="GET /tasks/all or GET /users/tasks/")
+    parser.add_argument("--paths", nargs="+", choices=["encoder", "stdlib", "orjson", "stream"])
+    parser.add_argument("--chunk", type=int, default=1000, help="tasks per streamed chunk")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed; the orjson path is skipped.")
+
+    runs = []
+    for tasks in sorted(args.sizes):
+        run = bench_size(tasks, args)
+        runs.append(run)
+        print(f"\n{tasks} tasks, {args.payload} payload (query {run['query_ms']:.1f} ms)")
+        print(f"{'path':<10} {'ms':>9} {'MB/s':>8} {'first ms':>9} {'peak KiB':>10} {'vs encoder':>11}")
+        baseline = run["paths"].get("encoder", {}).get("ms")
+        for name, result in run["paths"].items():
+            speedup = f"{baseline / result['ms']:>10.1f}x" if baseline and result["ms"] else f"{'-':>11}"
+            print(f"{name:<10} {result['ms']:>9.1f} {result['mb_per_sec']:>8.1f} {result['first_byte_ms']:>9.1f} "
+                  f"{result['peak_kib']:>10.0f} {speedup}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"payload": args.payload, "orjson": orjson.__version__ if orjson else None, "runs": runs},
+                      f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
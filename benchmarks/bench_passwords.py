@@ -0,0 +1,88 @@
+"""Login throughput at different bcrypt cost factors.
+
+For every cost this measures a single hash and check on the calling thread,
+then the number of logins per second the backend's PasswordHasher sustains
+with many concurrent logins, both for distinct accounts (every check runs
+bcrypt) and for a login storm on one account (served by the cache).
+
+    python -m benchmarks.bench_passwords --rounds 4 8 10 12 --logins 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from passwords import PasswordHasher, check_password, hash_password
+
+
+async def login_storm(hasher, credentials, concurrency):
+    """Verify every (username, password, hash) triple, ``concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login(username, password, stored):
+        async with semaphore:
+            assert await hasher.verify(username, password, stored)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login(*c) for c in credentials))
+    return len(credentials) / (time.perf_counter() - start)
+
+
+async def bench_rounds(rounds, logins, concurrency, workers):
+    stored = hash_password("password", rounds)
+
+    start = time.perf_counter()
+    hash_password("password", rounds)
+    hash_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    check_password("password", stored)
+    check_seconds = time.perf_counter() - start
+
+    hasher = PasswordHasher(rounds=rounds, workers=workers)
+    try:
+        await hasher.verify("warmup", "password", stored)  # Start the worker processes
+        hasher.clear_cache()
+
+        distinct = [(f"user{i}", "password", stored) for i in range(logins)]
+        uncached = await login_storm(hasher, distinct, concurrency)
+
+        storm = [("user0", "password", stored)] * logins
+        cached = await login_storm(hasher, storm, concurrency)
+    finally:
+        hasher.shutdown()
+
+    return {
+        "rounds": rounds,
+        "hash_ms": hash_seconds * 1000,
+        "check_ms": check_seconds * 1000,
+        "logins_per_sec": uncached,
+        "cached_logins_per_sec": cached,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[4, 8, 10, 12])
+    parser.add_argument("--logins", type=int, default=100, help="logins per measurement")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rounds':>6} {'hash ms':>9} {'check ms':>9} {'logins/s':>10} {'cached/s':>10}")
+    for rounds in args.rounds:
+        result = asyncio.run(bench_rounds(rounds, args.logins, args.concurrency, args.workers))
+        results.append(result)
+        print(f"{rounds:>6} {result['hash_ms']:>9.1f} {result['check_ms']:>9.1f} "
+              f"{result['logins_per_sec']:>10.1f} {result['cached_logins_per_sec']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"workers": args.workers, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
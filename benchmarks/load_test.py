@@ -0,0 +1,271 @@
+"""Load test for the FastAPI backend.
+
+Seeds a temporary database with ``--users`` users and ``--tasks`` tasks,
+starts the backend on it in a separate process and drives every endpoint
+in turn with ``--concurrency`` concurrent clients, reporting latency
+percentiles and throughput per endpoint.  Results can be written to a JSON
+file and compared with an earlier run:
+
+    python -m benchmarks.load_test --users 100 --tasks 10000 --json before.json
+    python -m benchmarks.load_test --users 100 --tasks 10000 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from database import Database
+from passwords import hash_password
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "password"
+WORDS = ("report", "review", "deploy", "invoice", "meeting", "design", "budget", "client",
+         "release", "backup", "migrate", "audit", "hiring", "roadmap", "support", "testing")
+
+
+def seed(path, users, tasks, rng):
+    """Create ``users`` users and ``tasks`` tasks spread over them. Returns the usernames."""
+    db = Database(path)
+    stored = hash_password(PASSWORD, 4)  # Hashing every account separately would dominate seeding
+    usernames = [f"user{i:05d}" for i in range(users)]
+    for username in usernames:
+        db.insert_user(username, stored, "user")
+    db.insert_user("admin", stored, "admin")
+
+    batch = []
+    for i in range(tasks):
+        words = rng.sample(WORDS, 4)
+        batch.append({"username": usernames[i % users], "title": f"{words[0]} {words[1]} {i}",
+                      "description": f"{words[2]} the {words[3]}", "status": "Pending"})
+        if len(batch) == 5000:
+            db.assign_tasks_bulk(batch)
+            batch = []
+    if batch:
+        db.assign_tasks_bulk(batch)
+    db.close()
+    return usernames
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(db_path, port, workdir):
+    env = dict(os.environ, TASK_MANAGER_DB=db_path, BCRYPT_ROUNDS="4",
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main_backend:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,  # So the bcrypt worker processes are stopped with it
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("The backend did not start")
+
+
+def stop_backend(server):
+    try:
+        os.killpg(server.pid, 15)
+    except ProcessLookupError:
+        pass
+    server.wait(10)
+
+
+def endpoints(usernames, tasks, rng):
+    """name -> function(i) returning (method, path, request kwargs) for the i-th request.
+
+    Requests that change data use fresh names and ids for every ``i``, so a
+    run never trips over its own earlier requests.
+    """
+    def some_user():
+        return rng.choice(usernames)
+
+    def event_stream(i):
+        return "GET", "/events", {"params": {"topic": "all"}}
+
+    return {
+        "POST /users/": lambda i: ("POST", "/users/", {"json": {"username": f"new{i}", "password": PASSWORD, "role": "user"}}),
+        "POST /login": lambda i: ("POST", "/login", {"json": {"username": some_user(), "password": PASSWORD}}),
+        "GET /users/ (legacy login)": lambda i: ("GET", "/users/", {"params": {"username": some_user(), "password": PASSWORD}}),
+        "POST /tasks/": lambda i: ("POST", "/tasks/", {"params": {"username": some_user()},
+                                                        "json": {"title": f"load {i}", "description": "load test"}}),
+        "POST /tasks/bulk": lambda i: ("POST", "/tasks/bulk", {"json": {"tasks": [
+            {"username": some_user(), "title": f"bulk {i} {j}", "description": "load test"} for j in range(50)]}}),
+        "GET /tasks/?username": lambda i: ("GET", "/tasks/", {"params": {"username": some_user()}}),
+        "GET /tasks/?username&title": lambda i: ("GET", "/tasks/", {"params": {"username": some_user(),
+                                                                                "title": rng.choice(WORDS)}}),
+        "GET /tasks/?q": lambda i: ("GET", "/tasks/", {"params": {"q": rng.choice(WORDS)[:4]}}),
+        "GET /tasks/all": lambda i: ("GET", "/tasks/all", {"params": {"limit": 100}}),
+        "GET /tasks/all?stream": lambda i: ("GET", "/tasks/all", {"params": {"stream": "true", "limit": 1000}}),
+        "PUT /tasks/{id}/status": lambda i: ("PUT", f"/tasks/{rng.randint(1, tasks)}/status",
+                                             {"params": {"new_status": rng.choice(["Pending", "Completed"])}}),
+        "PUT /tasks/status/batch": lambda i: ("PUT", "/tasks/status/batch", {"json": {"updates": [
+            {"task_id": rng.randint(1, tasks), "status": "Completed"} for _ in range(20)]}}),
+        "GET /users/directory": lambda i: ("GET", "/users/directory", {}),
+        "GET /users/tasks/": lambda i: ("GET", "/users/tasks/", {}),
+        "GET /sync": lambda i: ("GET", "/sync", {"params": {"since": 0, "limit": 1000}}),
+        "GET /events": event_stream,
+        "PUT /users/{username}/role": lambda i: ("PUT", f"/users/new{i}/role", {"json": {"role": "admin"}}),
+        "DELETE /tasks/{title}/": lambda i: ("DELETE", f"/tasks/load {i}/", {}),
+        "DELETE /users/{username}/": lambda i: ("DELETE", f"/users/new{i}/", {}),
+    }
+
+
+async def send(client, method, path, kwargs):
+    """Send one request and read the whole response. Returns the status code."""
+    if path == "/events":
+        # A stream never ends: time how long it takes to be subscribed.
+        async with client.stream(method, path, **kwargs) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("event: hello"):
+                    break
+            return response.status_code
+    async with client.stream(method, path, **kwargs) as response:
+        await response.aread()
+        return response.status_code
+
+
+async def run_endpoint(client, make_request, requests, concurrency):
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, path, kwargs = make_request(i)
+            start = time.perf_counter()
+            try:
+                status = await send(client, method, path, kwargs)
+            except httpx.HTTPError:
+                status = None
+            latencies.append(time.perf_counter() - start)
+            errors += status is None or status >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+async def drive(base_url, plan, requests, concurrency, selected):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        token = (await client.post("/login", json={"username": "admin", "password": PASSWORD})).json()["token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        results = {}
+        for name, make_request in plan.items():
+            if selected and name not in selected:
+                continue
+            results[name] = await run_endpoint(client, make_request, requests, concurrency)
+            print_row(name, results[name])
+        return results
+
+
+def print_row(name, result, baseline=None):
+    row = (f"{name:<30} {result['requests']:>6} {result['errors']:>6} {result['rps']:>9.1f} "
+           f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+    if baseline:
+        row += (f"   rps {change(baseline['rps'], result['rps'])}"
+                f"  p95 {change(baseline['p95_ms'], result['p95_ms'])}")
+    print(row)
+
+
+def change(before, after):
+    return f"{(after - before) / before * 100:+6.1f}%" if before else "     n/a"
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--endpoints", nargs="+", metavar="NAME", help="only these endpoints, e.g. 'GET /sync'")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="write the results to a JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="show changes against an earlier --json file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "load.db")
+        start = time.perf_counter()
+        usernames = seed(db_path, args.users, args.tasks, rng)
+        print(f"Seeded {args.users} users and {args.tasks} tasks in {time.perf_counter() - start:.1f}s")
+
+        port = free_port()
+        server = start_backend(db_path, port, workdir)
+        try:
+            print(f"{'endpoint':<30} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            plan = endpoints(usernames, args.tasks, rng)
+            results = asyncio.run(drive(f"http://127.0.0.1:{port}", plan, args.requests,
+                                        args.concurrency, args.endpoints))
+        finally:
+            stop_backend(server)
+
+    if baseline:
+        print("\nCompared with", args.compare)
+        for name, result in results.items():
+            print_row(name, result, baseline.get(name))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "config": {key: getattr(args, key) for key in ("users", "tasks", "requests", "concurrency", "seed")},
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
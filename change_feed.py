@@ -0,0 +1,85 @@
+import asyncio
+from collections import deque
+
+
+class Subscription:
+    """One listener's queue of events for the topics it asked for."""
+
+    def __init__(self, feed, topics, queue_size):
+        self.feed = feed
+        self.topics = frozenset(topics)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def _offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A listener this far behind has to resume from its last sequence number.
+            self.overflowed = True
+
+    async def get(self, timeout=None):
+        """Wait for the next event; None on timeout or once the listener fell behind."""
+        if self.overflowed:
+            return None
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.feed._subscribers.discard(self)
+
+
+class ChangeFeed:
+    """In-process publish/subscribe of task changes.
+
+    Every event gets a monotonically increasing sequence number and is
+    published to the ``all`` topic and to the owner's ``user:<name>`` topic.
+    The most recent events are kept so a listener that reconnects can resume
+    from the last sequence number it saw; if it has been away for longer than
+    the history covers, or its number is ahead of the feed's because the
+    server restarted, it gets a ``reset`` event and should reload.
+    """
+
+    def __init__(self, history=1000, queue_size=256):
+        self.queue_size = queue_size
+        self._seq = 0
+        self._history = deque(maxlen=history)  # (topics, event), oldest first
+        self._subscribers = set()
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    @staticmethod
+    def user_topic(username):
+        return f"user:{username}"
+
+    def publish(self, event_type, task, username):
+        """Record a change to ``task`` (a dict) owned by ``username`` and fan it out."""
+        self._seq += 1
+        event = {"seq": self._seq, "type": event_type, "username": username, "task": task}
+        topics = {"all", self.user_topic(username)}
+        self._history.append((topics, event))
+        for subscription in list(self._subscribers):
+            if subscription.topics & topics:
+                subscription._offer(event)
+        return event
+
+    def subscribe(self, topics, since=None):
+        """Subscribe to ``topics``. Returns (subscription, backlog of missed events)."""
+        subscription = Subscription(self, topics, self.queue_size)
+        self._subscribers.add(subscription)
+
+        backlog = []
+        if since is not None and since != self._seq:
+            oldest = self._history[0][1]["seq"] if self._history else self._seq + 1
+            if since > self._seq or since + 1 < oldest:
+                backlog.append({"seq": self._seq, "type": "reset"})
+            else:
+                backlog.extend(
+                    event for event_topics, event in self._history
+                    if event["seq"] > since and subscription.topics & event_topics
+                )
+        return subscription, backlog
@@ -1,230 +1,980 @@
 import sqlite3
-import hashlib
-import bcrypt
+import functools
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from passwords import check_password
+from log_config import SAMPLED
+from models import Task, User
+
+logger = logging.getLogger(__name__)
+
+# Queries on the request path.  They are shared with the methods below so the
+# plans checked at startup are the ones that actually run.
+USER_ID_BY_NAME_SQL = "SELECT user_id FROM users WHERE username = ?"
+TASK_DUPLICATE_SQL = "SELECT 1 FROM tasks WHERE user_id = ? AND title = ?"
+# Queries read into Task objects select (task_id, username, title,
+# description, status[, version]) in that order, for Task.from_row.
+SEARCH_TASK_SQL = """
+    SELECT tasks.task_id, users.username, tasks.title, tasks.description, tasks.status
+    FROM tasks
+    LEFT JOIN users ON tasks.user_id = users.user_id
+    WHERE users.username = ? AND tasks.title LIKE ?
+"""
+FETCH_TASK_ID_SQL = """
+    SELECT task_id FROM tasks
+    LEFT JOIN users ON tasks.user_id = users.user_id
+    WHERE users.username = ? AND tasks.title = ?
+"""
+TASK_ID_BY_TITLE_SQL = "SELECT task_id FROM tasks WHERE title = ?"
+TASK_ID_BY_ID_AND_TITLE_SQL = "SELECT task_id FROM tasks WHERE task_id = ? AND title = ?"
+TASK_BY_ID_SQL = """
+    SELECT tasks.task_id, users.username, tasks.title, tasks.description, tasks.status
+    FROM tasks
+    LEFT JOIN users ON tasks.user_id = users.user_id
+    WHERE tasks.task_id = ?
+"""
+# A task with the change log version of its current state, for conflict checks.
+TASK_VERSION_SQL = """
+    SELECT tasks.task_id, users.username, tasks.title, tasks.description, tasks.status,
+           task_changes.version
+    FROM tasks
+    LEFT JOIN users ON tasks.user_id = users.user_id
+    LEFT JOIN task_changes ON task_changes.entity = 'task' AND task_changes.entity_id = tasks.task_id
+    WHERE tasks.task_id = ?
+"""
+CREDENTIALS_SQL = "SELECT user_id, password, role FROM users WHERE username = ?"
+# Keyset pagination: the row-value comparison lets SQLite seek straight to the
+# cursor on the username index instead of skipping over OFFSET rows.
+TASK_PAGE_SQL = """
+    SELECT tasks.task_id, users.username, tasks.title, tasks.description, tasks.status
+    FROM users
+    JOIN tasks ON tasks.user_id = users.user_id
+    WHERE (users.username, tasks.task_id) > (?, ?)
+    ORDER BY users.username, tasks.task_id
+    LIMIT ?
+"""
+
+UPDATE_STATUS_SQL = "UPDATE tasks SET status = ? WHERE task_id = ?"
+# Reads every user and task, so it is not among the hot queries below.
+USERS_WITH_TASKS_SQL = """
+    SELECT users.user_id, users.username, users.role,
+           tasks.task_id, tasks.title, tasks.description, tasks.status
+    FROM users
+    LEFT JOIN tasks ON users.user_id = tasks.user_id
+    ORDER BY users.username
+"""
+
+FULL_TEXT_SEARCH_SQL = """
+    SELECT tasks.task_id, users.username, tasks.title, tasks.description, tasks.status,
+           bm25(tasks_fts, 10.0, 1.0) AS rank,
+           highlight(tasks_fts, 0, :open, :close),
+           snippet(tasks_fts, 1, :open, :close, '...', 16)
+    FROM tasks_fts
+    JOIN tasks ON tasks.task_id = tasks_fts.rowid
+    LEFT JOIN users ON users.user_id = tasks.user_id
+    WHERE tasks_fts MATCH :match AND (:username IS NULL OR users.username = :username)
+    ORDER BY rank
+    LIMIT :limit
+"""
+# Used instead when this SQLite build has no FTS5: a substring match on
+# either column, in task order.
+LIKE_SEARCH_SQL = """
+    SELECT tasks.task_id, users.username, tasks.title, tasks.description, tasks.status
+    FROM tasks
+    LEFT JOIN users ON users.user_id = tasks.user_id
+    WHERE (tasks.title LIKE :pattern OR tasks.description LIKE :pattern)
+      AND (:username IS NULL OR users.username = :username)
+    ORDER BY tasks.task_id
+    LIMIT :limit
+"""
+
+# Net changes since a client's last sync.  The log keeps one row per entity,
+# so each task or user appears at most once however often it changed; rows
+# whose task or user no longer exists are deletions.
+CHANGES_SINCE_SQL = """
+    SELECT task_changes.version, task_changes.entity, task_changes.entity_id,
+           owners.username, tasks.title, tasks.description, tasks.status,
+           users.username, users.role
+    FROM task_changes
+    LEFT JOIN tasks ON task_changes.entity = 'task' AND tasks.task_id = task_changes.entity_id
+    LEFT JOIN users AS owners ON owners.user_id = tasks.user_id
+    LEFT JOIN users ON task_changes.entity = 'user' AND users.user_id = task_changes.entity_id
+    WHERE task_changes.version > :since AND task_changes.version <= :head
+      AND (:user_id IS NULL OR task_changes.entity = 'user' OR task_changes.user_id = :user_id)
+    ORDER BY task_changes.version
+    LIMIT :limit
+"""
+
+# name -> (sql, sample parameters) for the startup EXPLAIN QUERY PLAN check.
+HOT_QUERIES = {
+    "user_id_by_name": (USER_ID_BY_NAME_SQL, ("",)),
+    "assign_task.duplicate_check": (TASK_DUPLICATE_SQL, (0, "")),
+    "search_task": (SEARCH_TASK_SQL, ("", "%%")),
+    "fetch_task_id": (FETCH_TASK_ID_SQL, ("", "")),
+    "delete_task.lookup": (TASK_ID_BY_TITLE_SQL, ("",)),
+    "check_user_credentials": (CREDENTIALS_SQL, ("",)),
+    "list_tasks_page": (TASK_PAGE_SQL, ("", 0, 1)),
+    "changes_since": (CHANGES_SINCE_SQL, {"since": 0, "head": 0, "user_id": None, "limit": 1}),
+}
+
+
+class MethodCall:
+    """What one call of a Database method did, as handed to ``Database.listeners``."""
+
+    __slots__ = ("method", "queries", "rows_returned", "rows_written", "seconds", "error", "last_sql")
+
+    def __init__(self, method):
+        self.method = method
+        self.queries = 0        # Statements run, not counting those run by triggers
+        self.last_sql = None
+        self.rows_returned = 0
+        self.rows_written = 0   # Including rows written by triggers (FTS index, change log)
+        self.seconds = 0.0
+        self.error = None       # Name of the exception the call raised, if any
+
+
+# Per-thread state of the outermost Database method running on it: its name
+# (``method``), its MethodCall when listeners are attached (``call``) and the
+# QueryTrace of the connection it has checked out when tracing (``trace``).
+# Methods called from inside another one are counted as part of it.
+_current = threading.local()
+
+# VM instructions between progress handler calls while tracing.
+PROGRESS_INTERVAL = 1000
+
+
+def _trace_statement(sql):
+    """sqlite3 trace callback: count and time the statements of the method in progress."""
+    if sql.startswith("--"):  # "-- ..." lines come from FTS5 internals
+        return
+    call = getattr(_current, "call", None)
+    # Each statement a trigger runs is reported with the text of the statement
+    # that fired it, so a repeat of the previous text is not a new statement.
+    if call is not None and sql != call.last_sql:
+        call.queries += 1
+        call.last_sql = sql
+    trace = getattr(_current, "trace", None)
+    if trace is not None:
+        trace.statement(sql)
+
+
+def _row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+def instrumented(method):
+    """Time a Database method and count its statements and rows for ``Database.listeners``."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if getattr(_current, "method", None) is not None:
+            return method(self, *args, **kwargs)
+
+        _current.method = method.__name__
+        if not self.listeners:
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                _current.method = None
+
+        call = _current.call = MethodCall(method.__name__)
+        start = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+            call.rows_returned = _row_count(result)
+            return result
+        except Exception as e:
+            call.error = type(e).__name__
+            raise
+        finally:
+            call.seconds = time.perf_counter() - start
+            _current.method = _current.call = None
+            for listener in self.listeners:
+                try:
+                    listener(call)
+                except Exception:
+                    logger.exception("Database listener failed")
+    return wrapper
+
+
+class StatementTrace:
+    """One SQL statement as seen by a tracer."""
+
+    __slots__ = ("method", "sql", "seconds", "steps")
+
+    def __init__(self, method, sql):
+        self.method = method    # The Database method that ran it, or None
+        self.sql = sql          # With its parameters filled in
+        self.seconds = 0.0      # From its start to the start of the next statement or the end of the checkout
+        self.steps = 0          # Approximate SQLite VM instructions, in PROGRESS_INTERVAL steps
+
+
+class QueryTrace:
+    """The statements run on one checked-out connection, for ``Database.tracer``.
+
+    The trace callback only reports when a statement starts, so each one is
+    taken to last until the next starts or the connection goes back to the
+    pool; that includes fetching its rows.  The progress handler adds the
+    number of VM instructions, which tells a scan from an index lookup even
+    on a small table.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = []
+        self._current = None
+        self._started = 0.0
+        conn.set_progress_handler(self._progress, PROGRESS_INTERVAL)
+
+    def statement(self, sql):
+        if self._current is not None and sql == self._current.sql:
+            return  # A trigger's statement, part of the current one
+        self._finish()
+        self._current = StatementTrace(getattr(_current, "method", None), sql)
+        self._started = time.perf_counter()
+
+    def _progress(self):
+        if self._current is not None:
+            self._current.steps += PROGRESS_INTERVAL
+        return 0  # Never interrupt the statement
+
+    def _finish(self):
+        if self._current is not None:
+            self._current.seconds = time.perf_counter() - self._started
+            self.statements.append(self._current)
+            self._current = None
+
+    def close(self):
+        """Stop tracing the connection. Returns the statements it ran."""
+        self._finish()
+        self.conn.set_progress_handler(None, 0)
+        return self.statements
+
+
+def _query(conn, row_factory, sql, params=()):
+    """Run ``sql`` on a cursor that builds each row with ``row_factory``."""
+    cursor = conn.cursor()
+    cursor.row_factory = row_factory
+    return cursor.execute(sql, params)
+
+
+def explain(conn, sql):
+    """EXPLAIN QUERY PLAN details for ``sql``, or [] if it has no plan."""
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    except sqlite3.Error:
+        return []
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """A bounded pool of SQLite connections shared between threads.
+
+    Connections are opened lazily up to ``max_size``, configured once with
+    their PRAGMAs and then reused.  Callers check a connection out with
+    ``connection()`` and it is returned to the pool when the block exits.
+    """
+
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL;',     # Readers don't block the writer
+        'PRAGMA synchronous=NORMAL;',   # Safe with WAL, far fewer fsyncs
+        'PRAGMA busy_timeout=5000;',    # Wait for the write lock instead of failing
+    )
+
+    def __init__(self, database, max_size=8, timeout=10.0):
+        self.database = database
+        # Every connection to ':memory:' is its own database, so share one.
+        self.max_size = 1 if database == ':memory:' else max_size
+        self.timeout = timeout
+
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    def _open(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        """Check a connection out of the pool, opening one if there is room."""
+        start = time.perf_counter()
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed.")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._created < self.max_size:
+                    self._created += 1
+                    conn = None
+                    break
+                remaining = self.timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.max_size})."
+                    )
+                if not waited:
+                    waited = True
+                    self._waits += 1
+                self._cond.wait(remaining)
+
+            elapsed = time.perf_counter() - start
+            self._checkouts += 1
+            self._wait_time += elapsed
+            self._max_wait = max(self._max_wait, elapsed)
+
+        if conn is None:
+            # Open outside the lock so a slow open doesn't stall other callers.
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back anything left open."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # The connection is unusable; drop it and make room for a new one.
+            conn.close()
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            if self._closed:
+                conn.close()
+                self._created -= 1
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection, committing on success and rolling back on error."""
+        conn = self.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Return a snapshot of the pool size and wait-time metrics."""
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "total_wait_seconds": self._wait_time,
+                "max_wait_seconds": self._max_wait,
+                "avg_wait_seconds": self._wait_time / self._checkouts if self._checkouts else 0.0,
+            }
+
+    def close(self):
+        """Close every idle connection; checked-out ones are closed on return."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
 
 
 class Database:
-    def __init__(self, db_username='database.db'):
+    def __init__(self, db_username='database.db', pool_size=8, tracer=None):
         self.db_username = db_username
+        self.pool = ConnectionPool(db_username, max_size=pool_size)
+        self.listeners = []  # Called with a MethodCall after every public method
+        self.tracer = tracer  # Called with (statements, connection) after every checkout
         self.create_tables()
 
-    def get_connection(self):
-        """Get the connection to the SQLite database."""
-        conn = sqlite3.connect(self.db_username, check_same_thread=False)
-        conn.execute('PRAGMA journal_mode=WAL;')  # Enable Write-Ahead Logging for concurrency
-        return conn
-    
-    
+    @contextmanager
+    def connection(self):
+        """Check a pooled connection out for the duration of a ``with`` block."""
+        with self.pool.connection() as conn:
+            call = getattr(_current, "call", None)
+            tracer = self.tracer
+            if call is None and tracer is None:
+                yield conn
+                return
+
+            # Only installed while someone is watching: the callback runs for
+            # every statement, which slows bulk writes down considerably.
+            conn.set_trace_callback(_trace_statement)
+            before = conn.total_changes
+            outer_trace = getattr(_current, "trace", None)
+            trace = _current.trace = QueryTrace(conn) if tracer is not None else None
+            try:
+                yield conn
+                if conn.in_transaction:
+                    conn.commit()  # Here rather than in the pool, so COMMIT is counted too
+            finally:
+                conn.set_trace_callback(None)
+                _current.trace = outer_trace
+                if call is not None:
+                    call.rows_written += conn.total_changes - before
+                if trace is not None:
+                    statements = trace.close()
+                    try:
+                        # Still checked out, so the tracer can EXPLAIN on it.
+                        tracer(statements, conn)
+                    except Exception:
+                        logger.exception("Query tracer failed")
+
+    def close(self):
+        """Close the pooled connections."""
+        self.pool.close()
 
     def create_tables(self):
         """Create the tables if they don't already exist."""
-        conn = self.get_connection()
-        c = conn.cursor()
+        with self.connection() as conn:
+            c = conn.cursor()
+
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL,
+                    role TEXT NOT NULL
+                )
+            ''')
+
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    status TEXT DEFAULT 'Pending',
+                    user_id INTEGER,
+                    FOREIGN KEY (user_id) REFERENCES users(user_id)
+                )
+            ''')
+
+            # Duplicate checks and per-user lookups filter on (user_id, title);
+            # deletes look tasks up by title alone.
+            c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_user_title ON tasks(user_id, title)")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks(title)")
+            # Walks each user's tasks in task_id order for the paginated listing.
+            c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_user ON tasks(user_id)")
+
+            self.fts_enabled = self._create_fts_index(c)
+            self._create_change_log(c)
+
+        self.check_query_plans()
+
+    def _create_fts_index(self, c):
+        """Create the FTS5 index over task titles and descriptions, kept in sync by triggers."""
+        exists = c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+        ).fetchone()
+        try:
+            # External-content table: the text lives in `tasks`, the index in `tasks_fts`.
+            c.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                    title, description,
+                    content='tasks', content_rowid='task_id',
+                    prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning("FTS5 is not available, task search falls back to LIKE: %s", e)
+            return False
 
         c.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL
-            )
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+                INSERT INTO tasks_fts(rowid, title, description)
+                VALUES (new.task_id, new.title, new.description);
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+                INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+                VALUES ('delete', old.task_id, old.title, old.description);
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+                INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+                VALUES ('delete', old.task_id, old.title, old.description);
+                INSERT INTO tasks_fts(rowid, title, description)
+                VALUES (new.task_id, new.title, new.description);
+            END
         ''')
 
+        if not exists:
+            # Index the tasks that were added before the FTS table existed.
+            c.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+        return True
+
+    def _create_change_log(self, c):
+        """Create the change log that incremental sync reads, kept up to date by triggers.
+
+        Every insert, update or delete of a task or user moves that entity's
+        single row to a new, higher ``version``.  ``user_id`` is the owner of
+        a task, kept after the task is deleted so the deletion can still be
+        sent to the right user.
+        """
+        exists = c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_changes'"
+        ).fetchone()
         c.execute('''
-            CREATE TABLE IF NOT EXISTS tasks (
-                task_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                status TEXT DEFAULT 'Pending',
+            CREATE TABLE IF NOT EXISTS task_changes (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                entity TEXT NOT NULL,
+                entity_id INTEGER NOT NULL,
                 user_id INTEGER,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
+                UNIQUE (entity, entity_id)
             )
         ''')
 
-        conn.commit()
-
+        for entity, table, key, owner in (("task", "tasks", "task_id", "user_id"),
+                                          ("user", "users", "user_id", "user_id")):
+            for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+                # Delete-then-insert rather than INSERT OR REPLACE: an outer
+                # INSERT OR IGNORE would override the conflict clause in here.
+                c.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_changes_{event.lower()} AFTER {event} ON {table} BEGIN
+                        DELETE FROM task_changes WHERE entity = '{entity}' AND entity_id = {row}.{key};
+                        INSERT INTO task_changes(entity, entity_id, user_id)
+                        VALUES ('{entity}', {row}.{key}, {row}.{owner});
+                    END
+                ''')
+
+        if not exists:
+            # Rows that predate the log are all changes to a client that has never synced.
+            c.execute("INSERT INTO task_changes(entity, entity_id, user_id) SELECT 'user', user_id, user_id FROM users")
+            c.execute("INSERT INTO task_changes(entity, entity_id, user_id) SELECT 'task', task_id, user_id FROM tasks")
+
+    def check_query_plans(self):
+        """Run EXPLAIN QUERY PLAN on the hot queries and warn about full table scans."""
+        plans = {}
+        with self.connection() as conn:
+            for name, (sql, params) in HOT_QUERIES.items():
+                details = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+                plans[name] = details
+                scans = [detail for detail in details if detail.startswith("SCAN")]
+                if scans:
+                    logger.warning("Query %s falls back to a table scan: %s", name, "; ".join(scans))
+        return plans
+
+    @instrumented
     def insert_user(self, username, password, role):
-        """Create a new user with the provided username, password, and role."""
-        conn = self.get_connection()
-        c = conn.cursor()
-
-        # Insert user data (username, password, and role) as plain text
-        c.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", (username, password, role))
-        conn.commit()
-        conn.close()
-        
+        """Create a new user with the provided username, password hash, and role."""
+        with self.connection() as conn:
+            # Passwords are hashed by the caller (see passwords.PasswordHasher)
+            conn.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", (username, password, role))
+
         return {"message": f"User {username} added successfully!"}
-    
 
-    
+    @instrumented
     def update_password(self, username, new_password):
-        """Update the password for the user in the database."""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
-        # Update the user's password with the new plain-text password
-        c.execute("UPDATE users SET password = ? WHERE username = ?", (new_password, username))
-        conn.commit()
-        conn.close()
+        """Update the stored password hash for the user in the database."""
+        with self.connection() as conn:
+            conn.execute("UPDATE users SET password = ? WHERE username = ?", (new_password, username))
 
         return {"message": f"Password for {username} updated successfully!"}
 
+    @instrumented
+    def get_user_auth(self, username):
+        """Return (user_id, stored password hash, role) for a user, or None if not found."""
+        with self.connection() as conn:
+            return conn.execute(CREDENTIALS_SQL, (username,)).fetchone()
 
+    @instrumented
     def check_user_credentials(self, username, password):
-        """Check user credentials and return the user role if valid."""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
-        # Fetch stored password and role from the database based on username
-        c.execute("SELECT password, role FROM users WHERE username = ?", (username,))
-        user = c.fetchone()
-        conn.close()
+        """Check user credentials and return the user role if valid.
+
+        This runs bcrypt on the calling thread; the backend verifies through
+        its PasswordHasher instead.
+        """
+        user = self.get_user_auth(username)
 
         if user:
-            stored_password, role = user  # Extract values from the result
-            
-            # Directly compare the entered password with the stored password
-            if stored_password == password:
-                return {"role": role}  # Passwords match, return user role
+            user_id, stored_password, role = user  # Extract values from the result
+
+            if check_password(password, stored_password):
+                return {"user_id": user_id, "role": role}  # Passwords match, return user role
             else:
                 return None  # Incorrect password
         return None  # User not found
 
-    
+    @instrumented
     def get_user_role(self, username):
         """Get the role of a user."""
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute("SELECT role FROM users WHERE username = ?", (username,))
-        role = c.fetchone()
-        conn.close()
+        with self.connection() as conn:
+            role = conn.execute("SELECT role FROM users WHERE username = ?", (username,)).fetchone()
         return role[0] if role else None
-    
-    def update_user_role(self, username, new_role):
-        """Update the role of an existing user."""
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute("UPDATE users SET role = ? WHERE username = ?", (new_role, username))
-        conn.commit()
-        conn.close()
-        print(f"User {username} role updated to {new_role}.")
-
-    def assign_task(self, username, title, description, status='Pending'):
-        """Assign a task to a user."""
-        conn = self.get_connection()
-        c = conn.cursor()
 
-        # Fetch user_id from users table
-        c.execute("SELECT user_id FROM users WHERE username = ?", (username,))
-        user_id = c.fetchone()
+    @instrumented
+    def list_users(self):
+        """Return every user as a User, ordered by username."""
+        with self.connection() as conn:
+            return _query(conn, User.from_row, "SELECT user_id, username, role FROM users ORDER BY username").fetchall()
 
-        if not user_id:
-            raise ValueError("User not found.")
+    @instrumented
+    def update_user_role(self, username, new_role):
+        """Update the role of an existing user and return their user_id, or None if not found."""
+        with self.connection() as conn:
+            c = conn.cursor()
+            result = c.execute(USER_ID_BY_NAME_SQL, (username,)).fetchone()
+            if not result:
+                return None
+            c.execute("UPDATE users SET role = ? WHERE user_id = ?", (new_role, result[0]))
+        logger.info("User %s role updated to %s", username, new_role)
+        return result[0]
+
+    @instrumented
+    def assign_task(self, username, title, description, status='Pending'):
+        """Assign a task to a user and return its task_id, or None if it was already assigned."""
+        with self.connection() as conn:
+            c = conn.cursor()
 
-        # Check if the task already exists to prevent duplicate entries
-        c.execute("""
-            SELECT * FROM tasks WHERE user_id = ? AND title = ?
-        """, (user_id[0], title))
+            # Fetch user_id from users table
+            c.execute(USER_ID_BY_NAME_SQL, (username,))
+            user_id = c.fetchone()
 
-        existing_task = c.fetchone()
+            if not user_id:
+                raise ValueError("User not found.")
 
-        if existing_task:
-            print(f"Task '{title}' already assigned to {username}. Skipping insert.")
-            return
+            # Check if the task already exists to prevent duplicate entries
+            c.execute(TASK_DUPLICATE_SQL, (user_id[0], title))
 
-        # Insert the task if it doesn't exist
-        c.execute("""
-            INSERT INTO tasks (user_id, title, description, status)
-            VALUES (?, ?, ?, ?)
-        """, (user_id[0], title, description, status))
+            existing_task = c.fetchone()
 
-        conn.commit()
+            if existing_task:
+                logger.debug("Task %r already assigned to %s, skipping insert", title, username, extra=SAMPLED)
+                return None
 
+            # Insert the task if it doesn't exist
+            c.execute("""
+                INSERT INTO tasks (user_id, title, description, status)
+                VALUES (?, ?, ?, ?)
+            """, (user_id[0], title, description, status))
+            return c.lastrowid
+
+    @instrumented
+    def assign_tasks_bulk(self, tasks):
+        """Assign many tasks in one transaction and report what happened to each.
+
+        ``tasks`` is a sequence of dicts with ``username``, ``title``,
+        ``description`` and optionally ``status``.  Usernames are resolved
+        and duplicates detected with one set-based query each, then the new
+        tasks are inserted with a single ``executemany``.  The result has one
+        entry per input item, in order, with ``result`` set to ``"created"``,
+        ``"duplicate"`` or ``"user_not_found"``, and ``task_id`` set for
+        created tasks.
+        """
+        batch = [
+            (index, task["username"], task["title"], task["description"], task.get("status") or 'Pending')
+            for index, task in enumerate(tasks)
+        ]
+        if not batch:
+            return []
+
+        with self.connection() as conn:
+            c = conn.cursor()
+            c.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS bulk_tasks (
+                    idx INTEGER PRIMARY KEY,
+                    username TEXT,
+                    title TEXT,
+                    description TEXT,
+                    status TEXT
+                )
+            ''')
+            c.execute("DELETE FROM bulk_tasks")
+            c.executemany("INSERT INTO bulk_tasks VALUES (?, ?, ?, ?, ?)", batch)
+
+            user_ids = dict(c.execute("""
+                SELECT DISTINCT bulk_tasks.username, users.user_id
+                FROM bulk_tasks
+                JOIN users ON users.username = bulk_tasks.username
+            """))
+            existing = set(c.execute("""
+                SELECT DISTINCT bulk_tasks.username, bulk_tasks.title
+                FROM bulk_tasks
+                JOIN users ON users.username = bulk_tasks.username
+                JOIN tasks ON tasks.user_id = users.user_id AND tasks.title = bulk_tasks.title
+            """))
+
+            results = []
+            rows = []
+            for index, username, title, description, status in batch:
+                if username not in user_ids:
+                    outcome = "user_not_found"
+                elif (username, title) in existing:
+                    outcome = "duplicate"
+                else:
+                    outcome = "created"
+                    # Later copies of the same task in this batch are duplicates too.
+                    existing.add((username, title))
+                    rows.append((user_ids[username], title, description, status))
+                results.append({"index": index, "username": username, "title": title, "result": outcome,
+                                "task_id": None})
+
+            # AUTOINCREMENT ids only grow, so the new rows are the ones above the old maximum.
+            max_before = c.execute("SELECT COALESCE(MAX(task_id), 0) FROM tasks").fetchone()[0]
+            c.executemany("""
+                INSERT INTO tasks (user_id, title, description, status)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            new_ids = {
+                (user_id, title): task_id
+                for task_id, user_id, title in c.execute(
+                    "SELECT task_id, user_id, title FROM tasks WHERE task_id > ?", (max_before,)
+                )
+            }
+            for item in results:
+                if item["result"] == "created":
+                    item["task_id"] = new_ids.get((user_ids[item["username"]], item["title"]))
+            c.execute("DELETE FROM bulk_tasks")
+
+        return results
+
+    @instrumented
     def search_task(self, username, title):
-        """Search for tasks assigned to a user by matching task titles partially."""
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute("""
-            SELECT tasks.title, tasks.description, tasks.status
-            FROM tasks
-            LEFT JOIN users ON tasks.user_id = users.user_id
-            WHERE users.username = ? AND tasks.title LIKE ?
-        """, (username, f"%{title}%"))
-        tasks = c.fetchall()
-        return tasks
-
+        """Search for tasks assigned to a user by matching task titles partially. Returns Tasks."""
+        with self.connection() as conn:
+            return _query(conn, Task.from_row, SEARCH_TASK_SQL, (username, f"%{title or ''}%")).fetchall()
+
+    @instrumented
+    def full_text_search(self, query, username=None, limit=50, highlight=("[", "]")):
+        """Search task titles and descriptions, best matches first.
+
+        Every word in ``query`` is matched as a prefix, so "rep bu" finds
+        "Report bug".  Each result carries its bm25 rank and the matched
+        words wrapped in the ``highlight`` markers.  Without FTS5, ``query``
+        is matched as a plain substring and results have no rank.
+        """
+        if not self.fts_enabled:
+            with self.connection() as conn:
+                tasks = _query(conn, Task.from_row, LIKE_SEARCH_SQL,
+                               {"pattern": f"%{query}%", "username": username, "limit": limit}).fetchall()
+            return [
+                {"task_id": task.task_id, "username": task.username, "title": task.title,
+                 "description": task.description, "status": task.status, "rank": None,
+                 "highlight": {"title": task.title, "description": task.description}}
+                for task in tasks
+            ]
+
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        with self.connection() as conn:
+            rows = conn.execute(FULL_TEXT_SEARCH_SQL, {
+                "match": match,
+                "username": username,
+                "limit": limit,
+                "open": highlight[0],
+                "close": highlight[1],
+            }).fetchall()
+
+        return [
+            {
+                "task_id": task_id,
+                "username": owner,
+                "title": title,
+                "description": description,
+                "status": status,
+                "rank": rank,
+                "highlight": {"title": title_hl, "description": description_hl},
+            }
+            for task_id, owner, title, description, status, rank, title_hl, description_hl in rows
+        ]
+
+    @instrumented
     def fetch_task_id(self, username, task_title):
         """Fetch the task_id based on username and exact task title."""
-        with self.get_connection() as conn:
-            c = conn.cursor()
-            c.execute("""
-                SELECT task_id FROM tasks
-                LEFT JOIN users ON tasks.user_id = users.user_id
-                WHERE users.username = ? AND tasks.title = ?
-            """, (username, task_title))
-            task_id = c.fetchone()
+        with self.connection() as conn:
+            task_id = conn.execute(FETCH_TASK_ID_SQL, (username, task_title)).fetchone()
         return task_id[0] if task_id else None
 
+    @instrumented
+    def get_task(self, task_id):
+        """Return the Task with ``task_id``, or None if it doesn't exist."""
+        with self.connection() as conn:
+            return _query(conn, Task.from_row, TASK_BY_ID_SQL, (task_id,)).fetchone()
 
+    @instrumented
     def update_task_status(self, task_id, new_status):
-        """Update the status of a task."""
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute("UPDATE tasks SET status = ? WHERE task_id = ?", (new_status, task_id))
-        conn.commit()
-        print(f"Task ID {task_id} status updated to {new_status}.")
-
+        """Update the status of a task and return the updated task, or None if it doesn't exist."""
+        with self.connection() as conn:
+            c = conn.cursor()
+            c.execute(UPDATE_STATUS_SQL, (new_status, task_id))
+            task = _query(conn, Task.from_row, TASK_BY_ID_SQL, (task_id,)).fetchone() if c.rowcount else None
+        logger.debug("Task %s status updated to %s", task_id, new_status, extra=SAMPLED)
+        return task
+
+    @instrumented
+    def update_task_statuses(self, updates, owner=None):
+        """Apply a batch of status changes queued by an offline client, in one transaction.
+
+        Each update is a dict with ``task_id``, ``status`` and optionally
+        ``base_version``, the version of the task the client last saw.  If the
+        task changed on the server since then the update is rejected as a
+        conflict and the server's copy wins.  With ``owner`` given, tasks of
+        other users are left alone.  Returns one dict per update with
+        ``result`` ("applied", "conflict", "forbidden" or "missing") and the
+        current Task, including its ``version``; None for the last two.
+        """
+        results = []
+        with self.connection() as conn:
+            c = conn.cursor()
+            for update in updates:
+                task_id, status = update["task_id"], update["status"]
+                row = c.execute(TASK_VERSION_SQL, (task_id,)).fetchone()
+                if row is None:
+                    results.append({"task_id": task_id, "result": "missing", "task": None})
+                    continue
+                if owner is not None and row[1] != owner:
+                    results.append({"task_id": task_id, "result": "forbidden", "task": None})
+                    continue
+
+                base_version = update.get("base_version")
+                if row[4] != status:
+                    if base_version is not None and row[5] != base_version:
+                        results.append({"task_id": task_id, "result": "conflict", "task": Task(*row)})
+                        continue
+                    c.execute(UPDATE_STATUS_SQL, (status, task_id))
+                    row = c.execute(TASK_VERSION_SQL, (task_id,)).fetchone()
+                # Already in the requested state counts as applied, so a retried batch is harmless.
+                results.append({"task_id": task_id, "result": "applied", "task": Task(*row)})
+        return results
+
+    @instrumented
     def delete_user(self, username):
-        """Delete a user from the database."""
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute('SELECT user_id FROM users WHERE username =?',(username,))
-        result = c.fetchone()
-        if result :
-            user_id  = result[0]
-            c.execute('DELETE FROM users WHERE user_id = ?', (user_id,))
-            conn.commit()
-            # print(f'User {username} deleted.')
-
-    def delete_task(self, task_title):
-        """Delete a task from the database."""
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute('SELECT task_id FROM tasks WHERE title = ?', (task_title,))
-        result = c.fetchone()
-        if result: 
-            tasks_id = result[0]        
-            c.execute('DELETE FROM tasks WHERE task_id = ?', (tasks_id,))
-            conn.commit()
-            # print(f'Task {task_title} deleted.')
+        """Delete a user from the database and return their user_id, or None if not found."""
+        with self.connection() as conn:
+            c = conn.cursor()
+            c.execute(USER_ID_BY_NAME_SQL, (username,))
+            result = c.fetchone()
+            if result:
+                user_id = result[0]
+                c.execute('DELETE FROM users WHERE user_id = ?', (user_id,))
+                logger.debug("User %s deleted", username)
+                return user_id
+        return None
+
+    @instrumented
+    def delete_task(self, task_title, task_id=None):
+        """Delete a task from the database and return it, or None if there is no such task.
+
+        Without ``task_id`` the first task with the title is deleted; with it,
+        only that task, and only if it still has the title.
+        """
+        with self.connection() as conn:
+            c = conn.cursor()
+            if task_id is None:
+                c.execute(TASK_ID_BY_TITLE_SQL, (task_title,))
+            else:
+                c.execute(TASK_ID_BY_ID_AND_TITLE_SQL, (task_id, task_title))
+            result = c.fetchone()
+            if result:
+                tasks_id = result[0]
+                deleted = _query(conn, Task.from_row, TASK_BY_ID_SQL, (tasks_id,)).fetchone()
+                c.execute('DELETE FROM tasks WHERE task_id = ?', (tasks_id,))
+                logger.debug("Task %r deleted", task_title)
+                return deleted
+        return None
+
+    @instrumented
+    def list_tasks_page(self, after=None, limit=100):
+        """Return up to ``limit`` tasks ordered by (username, task_id).
+
+        ``after`` is the (username, task_id) of the last task of the previous
+        page, or None for the first page.
+        """
+        after_username, after_task_id = after or ("", 0)
+        with self.connection() as conn:
+            return _query(conn, Task.from_row, TASK_PAGE_SQL, (after_username, after_task_id, limit)).fetchall()
+
+    @instrumented
+    def changes_since(self, since=0, user_id=None, limit=1000):
+        """Return what changed after version ``since``, as needed to bring a replica up to date.
+
+        With ``user_id`` only that user's tasks are included; users are always
+        included.  At most ``limit`` changes are returned; when ``more`` is
+        true the caller should ask again from the returned ``version``.
+        """
+        changes = {"version": since, "more": False, "tasks": [], "deleted_tasks": [],
+                   "users": [], "deleted_users": []}
+        with self.connection() as conn:
+            # Pin the head first: anything committed after it is left for the next sync.
+            head = conn.execute("SELECT COALESCE(MAX(version), 0) FROM task_changes").fetchone()[0]
+            rows = conn.execute(CHANGES_SINCE_SQL, {"since": since, "head": head,
+                                                    "user_id": user_id, "limit": limit}).fetchall()
+
+        for version, entity, entity_id, owner, title, description, status, username, role in rows:
+            if entity == "task":
+                if title is None:
+                    changes["deleted_tasks"].append(entity_id)
+                else:
+                    changes["tasks"].append(Task(entity_id, owner, title, description, status, version))
+            elif username is None:
+                changes["deleted_users"].append(entity_id)
+            else:
+                changes["users"].append(User(entity_id, username, role))
 
+        changes["more"] = len(rows) == limit
+        changes["version"] = rows[-1][0] if changes["more"] else max(head, since)
+        return changes
+
+    @instrumented
     def user_with_tasks(self):
-        """Get all users with their tasks."""
-        conn = self.get_connection()
-        c = conn.cursor()
-
-        c.execute("""
-            SELECT users.username, tasks.title, tasks.description, tasks.status
-            FROM users
-            LEFT JOIN tasks ON users.user_id = tasks.user_id
-            ORDER BY users.username;
-        """)
-
-        results = c.fetchall()
+        """Return every user as a User with their ``tasks``, ordered by username."""
+        with self.connection() as conn:
+            rows = conn.execute(USERS_WITH_TASKS_SQL).fetchall()
+
+        # Rows come ordered by username, one per task (or one per user without tasks).
         users = []
-        if results:
-            current_user = None
-            for row in results:
-                username, task_title, task_description, task_status = row
-                if username != current_user:
-                    current_user = username
-                    users.append(username)
-                    print(f"\n{username}'s Tasks:")
-
-                if task_title:
-                    print(f"   - {task_title}: {task_description} (Status: {task_status})")
-                else:
-                    print("   - No tasks assigned.")
-        else:
-            print("No users found in the database.")
+        user = None
+        for user_id, username, role, task_id, title, description, status in rows:
+            if user is None or user.user_id != user_id:
+                user = User(user_id, username, role, [])
+                users.append(user)
+            if task_id is not None:
+                user.tasks.append(Task(task_id, username, title, description, status))
+        logger.debug("Listed %d users with %d task rows", len(users), len(rows), extra=SAMPLED)
         return users
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query that matches every word as a prefix."""
+    words = re.findall(r"\w+", text or "")
+    # Quote each word so FTS5 operators in user input are treated as text.
+    return " ".join(f'"{word}"*' for word in words)
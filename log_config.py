@@ -0,0 +1,150 @@
+"""Logging setup shared by the backend and the desktop app.
+
+``configure_logging()`` is the one place logging is configured.  Records
+are put on a queue by a ``QueueHandler`` and written by a ``QueueListener``
+thread, so the thread that logs never waits on the terminal or a file.
+Call sites log with %-style arguments, which are only formatted for
+records that pass the level check.
+
+Hot paths mark their debug records with ``extra=SAMPLED``; only one in
+every ``sample_every`` of those is kept per call site, so turning on debug
+logging does not drown a busy server.
+
+Settings come from the environment unless given explicitly:
+
+    TASK_MANAGER_LOG_LEVEL    DEBUG, INFO (default), WARNING, ...
+    TASK_MANAGER_LOG_FORMAT   text (default) or json
+    TASK_MANAGER_LOG_SAMPLE   keep one in this many sampled debug records (default 100)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+# Pass as ``extra`` to have a debug record sampled.
+SAMPLED = {"sampled": True}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else was passed in ``extra``.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+_handler = None
+_lock = threading.Lock()
+
+
+def _extras(record):
+    return {key: value for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS and key != "sampled"}
+
+
+class TextFormatter(logging.Formatter):
+    """The usual one-line format, followed by any extra fields as key=value."""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record):
+        line = super().format(record)
+        extras = _extras(record)
+        if extras:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in extras.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with any extra fields as keys."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_extras(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Keep one in every ``every`` debug records marked with SAMPLED, per call site.
+
+    Kept records carry ``sample_rate`` so whoever reads them knows each one
+    stands for that many.
+    """
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, int(every))
+        self._counts = {}  # (logger, message template) -> records seen
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or not getattr(record, "sampled", False) or self.every == 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            seen = self._counts.get(key, 0)
+            self._counts[key] = seen + 1
+        if seen % self.every:
+            return False
+        record.sample_rate = self.every
+        return True
+
+
+def configure_logging(level=None, fmt=None, sample_every=None, stream=None):
+    """Route all logging through a background queue listener. Safe to call more than once.
+
+    Returns the QueueListener; it is stopped, flushing what is queued, at exit.
+    """
+    global _listener, _handler
+    level = level or os.environ.get("TASK_MANAGER_LOG_LEVEL", "INFO")
+    fmt = fmt or os.environ.get("TASK_MANAGER_LOG_FORMAT", "text")
+    if sample_every is None:
+        sample_every = int(os.environ.get("TASK_MANAGER_LOG_SAMPLE", 100))
+
+    with _lock:
+        _stop()
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        records = queue.SimpleQueue()
+        _handler = logging.handlers.QueueHandler(records)
+        _handler.addFilter(SampleFilter(sample_every))
+
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        return _listener
+
+
+def _stop():
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def shutdown_logging():
+    """Write out whatever is still queued and stop the listener thread."""
+    with _lock:
+        _stop()
+
+
+atexit.register(shutdown_logging)
@@ -4,12 +4,13 @@ from password_line_edit import PasswordLineEdit
 from admin_window import AdminWindow
 from user_window import UserWindow
 from api_client import APIClient  # Assuming your APIClient class is properly set up for login
-import asyncio
+from workers import api_runner
 
 class LoginWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.api = APIClient()
+        self.runner = api_runner()
         self.setWindowTitle("Login")
         self.resize(300, 200)
 
@@ -72,9 +73,9 @@ class LoginWindow(QWidget):
         # When Enter is pressed in the password field, attempt login.
         self.password_input.returnPressed.connect(self.login_user)
 
-        login_button = QPushButton("Login")
-        login_button.clicked.connect(self.login_user)
-        layout.addWidget(login_button)
+        self.login_button = QPushButton("Login")
+        self.login_button.clicked.connect(self.login_user)
+        layout.addWidget(self.login_button)
 
         signup_button = QPushButton("Sign Up")
         signup_button.clicked.connect(self.open_signup)
@@ -91,8 +92,21 @@ class LoginWindow(QWidget):
         username = self.username_input.text().strip()
         password = self.password_input.text().strip()
 
-        # Call API client to validate login
-        role = self.api.login(username, password)  # Assuming your APIClient class handles login
+        # Validate the login in the background; pressing Enter twice won't send it twice.
+        self.login_button.setEnabled(False)
+        self.runner.submit(
+            ("login", username), self.api.login, username, password,
+            on_result=lambda role: self.on_login_result(username, role),
+            on_error=self.on_login_error,
+        )
+
+    def on_login_error(self, error):
+        self.login_button.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Could not reach the server: {error}")
+
+    def on_login_result(self, username, role):
+        """Open the dashboard for the role returned by the backend."""
+        self.login_button.setEnabled(True)
 
         if role is None:  # API call failed, or user is not found
             QMessageBox.critical(self, "Error", "Invalid credentials!")
@@ -104,7 +118,7 @@ class LoginWindow(QWidget):
             self.admin_window.show()
         elif role== "user":
             QMessageBox.information(self, "Login Successful", f"Welcome {username} (User)!")
-            self.user_window = UserWindow(username)
+            self.user_window = UserWindow(username, self.api)
             self.user_window.show()
         else:
             QMessageBox.critical(self, "Error", "Invalid role!")
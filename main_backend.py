@@ -1,12 +1,66 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from database import Database
+from query_log import DEFAULT_THRESHOLD, SlowQueryLog
+from async_database import AsyncDatabase
+from sessions import InvalidToken, SessionManager
+from passwords import PasswordHasher
+from change_feed import ChangeFeed
+from response_cache import GLOBAL_SCOPE, ResponseCache, etag_matches
+from log_config import configure_logging
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, BackendMetrics
+from models import Task as TaskRecord, dumps
+from responses import FastJSONResponse, dumps_bytes, ndjson_chunk
 import requests
 import logging
-app = FastAPI()
-db = Database()
-logging.basicConfig(level=logging.DEBUG)
+import base64
+import json
+import os
+import time
+
+db = Database(os.environ.get("TASK_MANAGER_DB", "database.db"))
+if os.environ.get("TASK_MANAGER_SLOW_QUERY_LOG"):
+    # Opt-in: tracing every statement costs a few microseconds each.
+    db.tracer = SlowQueryLog(os.environ["TASK_MANAGER_SLOW_QUERY_LOG"],
+                             float(os.environ.get("TASK_MANAGER_SLOW_QUERY_SECONDS", DEFAULT_THRESHOLD)))
+adb = AsyncDatabase(db)  # Keeps SQLite calls off the event loop
+sessions = SessionManager()
+hasher = PasswordHasher()  # bcrypt runs in worker processes, cost from BCRYPT_ROUNDS
+feed = ChangeFeed()  # Task changes pushed to clients over /events
+result_cache = ResponseCache()  # Serialized GET results, retired by writes
+metrics = BackendMetrics(db)  # Request and database timings served on /metrics
+
+# Seconds between keep-alive comments on an idle event stream.
+EVENT_HEARTBEAT = 15
+
+# Routes that can be called without a session token.
+PUBLIC_ROUTES = {
+    ("POST", "/users/"),   # Register
+    ("GET", "/users/"),    # Legacy login
+    ("POST", "/login"),
+    ("GET", "/docs"),
+    ("GET", "/redoc"),
+    ("GET", "/openapi.json"),
+    ("GET", "/metrics"),   # Scraped by Prometheus, which has no session
+}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    hasher.shutdown()
+    adb.shutdown()
+    db.close()
+    if db.tracer:
+        db.tracer.close()
+
+
+app = FastAPI(lifespan=lifespan)
+configure_logging()
+logger = logging.getLogger(__name__)
 
 class User(BaseModel):
     username: str
@@ -20,6 +74,24 @@ class Task(BaseModel):
     status: Optional[str] = 'Pending'
     
     
+class BulkTask(Task):
+    username: str
+
+
+class BulkAssignRequest(BaseModel):
+    tasks: List[BulkTask]
+
+
+class StatusUpdate(BaseModel):
+    task_id: int
+    status: str
+    base_version: Optional[int] = None  # Task version the client's change was based on
+
+
+class StatusBatch(BaseModel):
+    updates: List[StatusUpdate]
+
+
 class UserTask(BaseModel): 
     name: str
     tasks: List[Task]
@@ -27,24 +99,146 @@ class UserTask(BaseModel):
 class LoginRequest(BaseModel):
     username: str
     password: str
-    
+
+
+class RoleUpdate(BaseModel):
+    role: str
+
+
+@app.middleware("http")
+async def authenticate(request: Request, call_next):
+    """Resolve the bearer token to a session without touching the database."""
+    request.state.session = None
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            request.state.session = sessions.validate(token)
+        except InvalidToken as e:
+            return JSONResponse(status_code=401, content={"detail": str(e)})
+    elif (request.method, request.url.path) not in PUBLIC_ROUTES:
+        return JSONResponse(status_code=401, content={"detail": "Not authenticated"},
+                            headers={"WWW-Authenticate": "Bearer"})
+    return await call_next(request)
+
+
+# Registered after authenticate, so it runs outside it and times rejected requests too.
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Time every request and its database calls by route template and status."""
+    token = metrics.start_request()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # The template ("/tasks/{task_id}/status") rather than the path keeps
+        # the number of series bounded.  Streamed bodies are timed to their
+        # first byte only.
+        route = request.scope.get("route")
+        metrics.observe_request(token, request.method, route.path if route else "unmatched",
+                                status, time.perf_counter() - start)
+
+
+def require_admin(request: Request):
+    session = request.state.session
+    if session is None or session.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required.")
+    return session
+
+
+def task_owner_filter(session):
+    """The username whose tasks ``session`` may change, or None for an admin, who may change any."""
+    return None if session.role == "admin" else session.username
+
+
+async def start_session(username, password):
+    user = await adb.get_user_auth(username)
+
+    if not user or not await hasher.verify(username, password, user[1]):
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    user_id, stored_password, role = user
+    if hasher.needs_rehash(stored_password):
+        # Upgrade plain-text passwords and hashes made with an older cost factor.
+        await adb.update_password(username, await hasher.hash(password))
+
+    token = sessions.issue(user_id, username, role)
+    return {"role": role, "token": token, "expires_in": sessions.ttl}
 
         
 
 @app.post("/users/")
 async def create_user(user: User): 
-    db.insert_user(user.username,user.password,user.role)
+    password_hash = await hasher.hash(user.password)
+    await adb.insert_user(user.username,password_hash,user.role)
+    result_cache.invalidate(user.username)
     return {"message": f"User {user.username} added successfully"}
 
 @app.post("/tasks/")
-async def assign_task(username : str, task : Task):
-    db.assign_task(username, task.title, task.description)
+async def assign_task(username : str, task : Task, admin=Depends(require_admin)):
+    task_id = await adb.assign_task(username, task.title, task.description)
+    if task_id is not None:
+        result_cache.invalidate(username)
+        feed.publish("task_created", TaskRecord(task_id, username, task.title, task.description, 'Pending'), username)
     return {"message": f"Task '{task.title}' assigned to {username}."}
 
-@app.get("/tasks/")
-async def search_task(username: str, title:Optional[str] = None):
+@app.post("/tasks/bulk")
+async def assign_tasks_bulk(request: BulkAssignRequest, admin=Depends(require_admin)):
+    tasks = [task.model_dump() for task in request.tasks]
+    results = await adb.assign_tasks_bulk(tasks)
+    summary = {"created": 0, "duplicate": 0, "user_not_found": 0}
+    for item in results:
+        summary[item["result"]] += 1
+        if item["result"] == "created":
+            task = tasks[item["index"]]
+            result_cache.invalidate(task["username"])
+            feed.publish("task_created", TaskRecord(item["task_id"], task["username"], task["title"],
+                                                    task["description"], task["status"]), task["username"])
+    return {"summary": summary, "results": results}
+
+def json_response(content, headers=None):
+    """JSON response for ``content``, which may hold Task and User objects."""
+    return FastJSONResponse(content, headers=headers)
+
+async def cached_response(request, scope, build):
+    """Serve the JSON from ``build()`` through the result cache, with an ETag.
+
+    The ETag is the version of the data in ``scope``, so it is known before
+    anything is queried: a client whose copy is current gets a bare 304, and
+    anyone else gets the cached body unless a write has retired it.
+    """
+    etag = result_cache.etag(scope)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}  # Always revalidate
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+    body = result_cache.get(key, etag)
+    if body is None:
+        body = dumps_bytes(await build())
+        result_cache.put(key, etag, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/tasks/", response_class=FastJSONResponse)
+async def search_task(request: Request, username: Optional[str] = None, title: Optional[str] = None,
+                      q: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    # Results for one user only change with that user's tasks.
+    scope = result_cache.user_scope(username) if username else GLOBAL_SCOPE
+    return await cached_response(request, scope, lambda: find_tasks(username, title, q, limit))
+
+async def find_tasks(username, title, q, limit):
+    if q is not None:
+        # Full-text search over titles and descriptions, optionally for one user.
+        tasks = await adb.full_text_search(q, username, limit)
+        return {"user": username, "query": q, "task": tasks}
+
+    if not username:
+        raise HTTPException(status_code=422, detail="Either username or q is required.")
+
     try:
-        tasks = db.search_task(username,title)
+        tasks = await adb.search_task(username,title)
 
         if tasks is None:
             raise HTTPException(status_code=404, detail="User not found.")
@@ -52,44 +246,183 @@ async def search_task(username: str, title:Optional[str] = None):
         if not tasks:  # User exists but has no tasks
             raise HTTPException(status_code=404, detail="No tasks assigned to this user.")
 
-        return {
-            "user": username,
-            "task": [  # Wrap tasks in "task" key
-                {"title": t[0], "description": t[1], "status": t[2]} for t in tasks
-            ]
-        }
-    except Exception as e: 
-        logging.error(f"Error occured while searching task: {str(e)}")
+        return {"user": username, "task": tasks}
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error occurred while searching tasks")
         raise HTTPException(status_code= 500 , detail= "Internal Server Error")
 
 
+def encode_cursor(task):
+    """Opaque page cursor pointing just past ``task``."""
+    raw = json.dumps([task.username, task.task_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor):
+    try:
+        username, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(username), int(task_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+async def stream_all_tasks(after, chunk_size):
+    """Yield every task as NDJSON, reading one keyset page at a time."""
+    while True:
+        page = await adb.list_tasks_page(after, chunk_size)
+        if not page:
+            return
+        yield ndjson_chunk(page)
+        if len(page) < chunk_size:
+            return
+        after = (page[-1].username, page[-1].task_id)
+
+@app.get("/tasks/all", response_class=FastJSONResponse)
+async def list_all_tasks(cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000),
+                         stream: bool = False):
+    after = decode_cursor(cursor) if cursor else None
+
+    if stream:
+        # Memory stays at one chunk no matter how many tasks there are.
+        return StreamingResponse(stream_all_tasks(after, limit), media_type="application/x-ndjson")
+
+    tasks = await adb.list_tasks_page(after, limit)
+    next_cursor = encode_cursor(tasks[-1]) if len(tasks) == limit else None
+    return json_response({"tasks": tasks, "next_cursor": next_cursor})
+
 @app.put("/tasks/{task_id}/status")
-async def update_status( task_id: int, new_status: str): 
-    db.update_task_status(task_id, new_status)
+async def update_status(request: Request, task_id: int, new_status: str):
+    owner = task_owner_filter(request.state.session)
+    if owner is not None:
+        task = await adb.get_task(task_id)
+        if task is not None and task.username != owner:
+            raise HTTPException(status_code=403, detail="You can only change your own tasks.")
+    task = await adb.update_task_status(task_id, new_status)
+    if task is not None:
+        result_cache.invalidate(task.username)
+        feed.publish("task_updated", task, task.username)
     return {"message":f"Task {task_id} status updated to {new_status}."}
 
+@app.put("/tasks/status/batch")
+async def update_status_batch(request: Request, batch: StatusBatch):
+    """Apply status changes queued offline; updates based on a stale version are rejected."""
+    results = await adb.update_task_statuses([update.model_dump() for update in batch.updates],
+                                             task_owner_filter(request.state.session))
+    for result in results:
+        if result["result"] == "applied":
+            task = result["task"]
+            result_cache.invalidate(task.username)
+            feed.publish("task_updated", task, task.username)
+    return json_response({"results": results})
+
+@app.get("/users/directory", response_class=FastJSONResponse)
+async def user_directory():
+    return json_response({"users": await adb.list_users()})
+
+@app.put("/users/{username}/role")
+async def update_user_role(username: str, update: RoleUpdate, admin=Depends(require_admin)):
+    if update.role not in ("user", "admin"):
+        raise HTTPException(status_code=422, detail="Role must be 'user' or 'admin'.")
+    user_id = await adb.update_user_role(username, update.role)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found.")
+    sessions.revoke_user(user_id)  # Tokens still carry the old role
+    result_cache.invalidate(username)  # Cached listings include the role
+    return {"message": f"User {username} role updated to {update.role}."}
+
 @app.delete("/users/{username}/")
-async def delete_user(username: str):
-    db.delete_user(username)
+async def delete_user(username: str, admin=Depends(require_admin)):
+    user_id = await adb.delete_user(username)
+    if user_id is not None:
+        result_cache.invalidate(username)
+        sessions.revoke_user(user_id)
     return{"message":f"user {username} was deleted."}
     
 
 @app.delete("/tasks/{task_title}/")
-async def delete_task( task_title: str):
-    db.delete_task(task_title)
+async def delete_task( task_title: str, task_id: Optional[int] = None, admin=Depends(require_admin)):
+    # Titles need not be unique; clients that know the task's id send it too.
+    task = await adb.delete_task(task_title, task_id)
+    if task is not None:
+        result_cache.invalidate(task.username)
+        feed.publish("task_deleted", task, task.username)
     return{"message":f"task {task_title} was deleted."}
 
-@app.get("/users/tasks/")
-async def show_all_member_with_tasks():
-    users_tasks = db.user_with_tasks()
-    return{"users with tasks": users_tasks}
+@app.get("/sync", response_class=FastJSONResponse)
+async def sync(request: Request, since: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=5000)):
+    """Changes since version ``since``, for clients that keep a local replica.
 
+    Users get their own tasks and admins everyone's; the user directory is
+    included for both.  Keep calling with the returned ``version`` while
+    ``more`` is true.
+    """
+    session = request.state.session
+    user_id = None if session.role == "admin" else session.user_id
+    return json_response(await adb.changes_since(since, user_id, limit))
 
-@app.get("/users/")
-async def login(username, password):
-    user_data = db.check_user_credentials(username, password)
-    
-    if not user_data:  # If user_data is None or empty
-        raise HTTPException(status_code=401, detail="Invalid username or password")
+@app.get("/users/tasks/", response_class=FastJSONResponse)
+async def show_all_member_with_tasks(request: Request):
+    async def build():
+        users_tasks = await adb.user_with_tasks()
+        return{"users with tasks": users_tasks}
+    return await cached_response(request, GLOBAL_SCOPE, build)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def format_event(event):
+    """Server-Sent Events framing; the sequence number is the event id clients resume from."""
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {dumps(event)}\n\n"
+
+@app.get("/events")
+async def task_events(request: Request, topic: Optional[str] = None, since: Optional[int] = None):
+    """Stream task changes as Server-Sent Events.
+
+    Users get their own ``user:<name>`` topic; admins may also follow another
+    user's topic or ``all``.  Reconnecting with ``since`` (or the standard
+    Last-Event-ID header) replays what was missed.
+    """
+    session = request.state.session
+    own_topic = feed.user_topic(session.username)
+    topic = topic or own_topic
+    if topic != own_topic and session.role != "admin":
+        raise HTTPException(status_code=403, detail="You can only follow your own tasks.")
 
-    return {"role": user_data["role"]}
+    if since is None and request.headers.get("last-event-id", "").isdigit():
+        since = int(request.headers["last-event-id"])
+
+    subscription, backlog = feed.subscribe({topic}, since)
+
+    async def stream():
+        try:
+            for event in backlog:
+                yield format_event(event)
+            # Tells the client where it is now, so it can resume from here.
+            yield format_event({"seq": feed.last_seq, "type": "hello", "topic": topic})
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=EVENT_HEARTBEAT)
+                if event is not None:
+                    yield format_event(event)
+                elif subscription.overflowed:
+                    return  # The client reconnects and resumes from its last id
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/login")
+async def login(credentials: LoginRequest):
+    return await start_session(credentials.username, credentials.password)
+
+
+@app.get("/users/")
+async def legacy_login(username, password):
+    """Older clients send credentials as query parameters; prefer POST /login."""
+    return await start_session(username, password)
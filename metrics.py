@@ -0,0 +1,227 @@
+"""Counters and histograms exposed in the Prometheus text format.
+
+A small stand-in for prometheus_client, enough for the backend's /metrics:
+labelled counters and histograms, values read from a callback at scrape
+time, and a registry that renders them all.
+"""
+import bisect
+import contextvars
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request and query latencies, in seconds.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds of database time spent on behalf of the request being handled.
+# The middleware sets it to a one-element list that database listeners add to.
+request_db_time = contextvars.ContextVar("request_db_time", default=None)
+
+
+def _format_value(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values -> count
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            return series[-1] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            le = (("le", "+Inf"),)
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {values[-1]}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{label_text} {values[-1]}")
+        return lines
+
+
+class Collected:
+    """A gauge, or a counter kept elsewhere, whose value is read at scrape time.
+
+    ``collect`` returns {label value: number} for a single label, or a
+    plain number when there are no labels.
+    """
+
+    def __init__(self, name, documentation, collect, labelname=None, kind="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.labelname = labelname
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        values = self.collect()
+        if self.labelname is None:
+            lines.append(f"{self.name} {_format_value(values)}")
+        else:
+            for label, value in sorted(values.items()):
+                lines.append(f"{self.name}{_format_labels((self.labelname,), (label,))} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def collected(self, *args, **kwargs):
+        return self.register(Collected(*args, **kwargs))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class BackendMetrics:
+    """The metrics the backend exposes on /metrics.
+
+    HTTP requests are recorded per method, route template and status by the
+    backend's middleware through ``observe_request``.  ``observe_database``
+    is a ``Database`` listener: it records every method call and adds its
+    time to the request that made it, so a route's database time can be told
+    apart from the time spent in Python and serialization.
+    """
+
+    def __init__(self, db=None):
+        self.registry = Registry()
+        self.requests = self.registry.histogram(
+            "http_request_duration_seconds", "Time to produce the response, by route and status.",
+            ("method", "route", "status"))
+        self.request_db = self.registry.histogram(
+            "http_request_db_seconds", "Database time spent on one request, by route.",
+            ("method", "route"))
+        self.in_progress = self.registry.collected(
+            "http_requests_in_progress", "Requests being handled.", lambda: self._in_progress)
+        self.db_calls = self.registry.histogram(
+            "db_method_duration_seconds", "Duration of Database method calls.", ("method", "outcome"))
+        self.db_queries = self.registry.counter(
+            "db_queries_total", "SQL statements run by Database methods.", ("method",))
+        self.db_rows_returned = self.registry.counter(
+            "db_rows_returned_total", "Rows or items returned by Database methods.", ("method",))
+        self.db_rows_written = self.registry.counter(
+            "db_rows_written_total", "Rows inserted, updated or deleted, including by triggers.", ("method",))
+        self._in_progress = 0
+        self._lock = threading.Lock()
+        if db is not None:
+            self.watch_database(db)
+
+    def watch_database(self, db):
+        """Record ``db``'s method calls and expose its connection pool state."""
+        db.listeners.append(self.observe_database)
+        pool_stats = db.pool.stats
+        self.registry.collected("db_pool_connections", "Pooled connections by state.",
+                                lambda: {state: pool_stats()[state] for state in ("max_size", "open", "idle", "in_use")},
+                                labelname="state")
+        for key, name, documentation in (
+            ("checkouts", "db_pool_checkouts_total", "Connections checked out of the pool."),
+            ("waits", "db_pool_waits_total", "Checkouts that had to wait for a free connection."),
+            ("timeouts", "db_pool_timeouts_total", "Checkouts that gave up waiting."),
+            ("total_wait_seconds", "db_pool_wait_seconds_total", "Time spent waiting for a connection."),
+        ):
+            self.registry.collected(name, documentation, lambda key=key: pool_stats()[key], kind="counter")
+
+    def start_request(self):
+        with self._lock:
+            self._in_progress += 1
+        return request_db_time.set([0.0])
+
+    def observe_request(self, token, method, route, status, seconds):
+        db_time = request_db_time.get()
+        request_db_time.reset(token)
+        with self._lock:
+            self._in_progress -= 1
+        self.requests.observe(seconds, method, route, str(status))
+        self.request_db.observe(db_time[0] if db_time else 0.0, method, route)
+
+    def observe_database(self, call):
+        outcome = "error" if call.error else "ok"
+        self.db_calls.observe(call.seconds, call.method, outcome)
+        self.db_queries.inc(call.method, amount=call.queries)
+        self.db_rows_returned.inc(call.method, amount=call.rows_returned)
+        self.db_rows_written.inc(call.method, amount=call.rows_written)
+        db_time = request_db_time.get()
+        if db_time is not None:
+            db_time[0] += call.seconds
+
+    def render(self):
+        return self.registry.render()
@@ -0,0 +1,72 @@
+"""Users and tasks as the Database returns them.
+
+Both are slotted dataclasses: an instance holds only its field values, with
+no per-instance ``__dict__``, and is built straight from a result row by
+the row factories below, without an intermediate dict.  ``dumps`` turns
+them, and anything containing them, into JSON for a response.
+"""
+import json
+from dataclasses import dataclass, fields
+from operator import attrgetter
+
+
+@dataclass(slots=True)
+class Task:
+    task_id: int
+    username: str
+    title: str
+    description: str
+    status: str
+    version: int = None  # Change log version, where the query reads it
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row factory for (task_id, username, title, description, status[, version]) rows."""
+        return cls(*row)
+
+    @classmethod
+    def from_dict(cls, data, default_username=None):
+        """A task from its JSON form, as received from the backend."""
+        return cls(data.get("task_id"), data.get("username") or default_username, data.get("title", ""),
+                   data.get("description", ""), data.get("status", "Pending"), data.get("version"))
+
+
+@dataclass(slots=True)
+class User:
+    user_id: int
+    username: str
+    role: str
+    tasks: list = None  # Their tasks, where the query reads them
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row factory for (user_id, username, role) rows."""
+        return cls(*row)
+
+
+def _encoder(cls):
+    """Function turning a ``cls`` instance into a dict, leaving out optional fields not read."""
+    names = cls.__slots__
+    optional = {field.name for field in fields(cls) if field.default is None}
+    values = attrgetter(*names)
+
+    def encode(obj):
+        return {name: value for name, value in zip(names, values(obj))
+                if value is not None or name not in optional}
+    return encode
+
+
+_ENCODERS = {Task: _encoder(Task), User: _encoder(User)}
+
+
+def json_default(obj):
+    """``default`` hook for JSON encoders: Task and User objects as dicts."""
+    encode = _ENCODERS.get(type(obj))
+    if encode is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return encode(obj)
+
+
+def dumps(value):
+    """JSON for ``value``, which may contain Task and User objects."""
+    return json.dumps(value, default=json_default, separators=(",", ":"), ensure_ascii=False)
@@ -1,10 +1,139 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# How a burst of one kind of event is summed up in a single notification.
+SUMMARIES = {
+    "task_created": ("New tasks", "{count} new tasks assigned"),
+    "task_updated": ("Tasks updated", "{count} tasks updated"),
+    "task_deleted": ("Tasks removed", "{count} tasks removed"),
+}
+
+_STOP = object()
+
+
+class PlyerSink:
+    """Show notifications on the desktop through plyer."""
+
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+
+    def __call__(self, title, message):
+        from plyer import notification  # Only needed where notifications are actually shown
+        notification.notify(title=title, message=message, timeout=self.timeout)
+
+
+class StubSink:
+    """Collect notifications instead of showing them, for tests and headless runs."""
+
+    def __init__(self):
+        self.sent = []
+        self.delivered = threading.Event()
+
+    def __call__(self, title, message):
+        self.sent.append((title, message))
+        self.delivered.set()
+
+
+class NotificationDispatcher:
+    """Deliver notifications from a background thread, merging bursts.
+
+    ``notify`` only puts the notification on a queue, so producers never wait
+    for the sink.  Notifications of the same kind for the same user that
+    arrive within ``window`` seconds of the first are merged: one is shown
+    as is, several become a summary such as "12 new tasks assigned".  Each
+    user gets at most ``rate_limit`` notifications per ``rate_period``
+    seconds; anything over that keeps accumulating into the next summary.
+    """
+
+    def __init__(self, sink=None, window=2.0, rate_limit=5, rate_period=60.0):
+        self.sink = sink or PlyerSink()
+        self.window = window
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+
+        self._queue = queue.SimpleQueue()
+        self._pending = {}   # (user, kind) -> [due time, [(title, message), ...]]
+        self._sent = {}      # user -> deque of delivery times within rate_period
+        self._thread = threading.Thread(target=self._run, name="notifications", daemon=True)
+        self._thread.start()
+
+    def notify(self, user, kind, title, message):
+        """Queue a notification for ``user``. Never blocks."""
+        self._queue.put((user, kind, title, message))
+
+    def close(self, timeout=5.0):
+        """Deliver whatever is still waiting, ignoring windows and rate limits, and stop."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            due = min((group[0] for group in self._pending.values()), default=None)
+            wait = None if due is None else max(due - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                for key in list(self._pending):
+                    self._deliver(key)
+                return
+            if item is not None:
+                user, kind, title, message = item
+                group = self._pending.setdefault((user, kind), [time.monotonic() + self.window, []])
+                group[1].append((title, message))
+
+            now = time.monotonic()
+            for key, group in list(self._pending.items()):
+                if group[0] > now:
+                    continue
+                next_slot = self._next_slot(key[0], now)
+                if next_slot > now:
+                    group[0] = next_slot  # Over the limit: hold it, and keep merging into it
+                else:
+                    self._deliver(key)
+
+    def _next_slot(self, user, now):
+        """When ``user`` may next be notified, given the rate limit."""
+        sent = self._sent.setdefault(user, deque())
+        while sent and sent[0] <= now - self.rate_period:
+            sent.popleft()
+        return sent[0] + self.rate_period if len(sent) >= self.rate_limit else now
+
+    def _deliver(self, key):
+        user, kind = key
+        _due, items = self._pending.pop(key)
+        if len(items) == 1:
+            title, message = items[0]
+        else:
+            title, template = SUMMARIES.get(kind, ("Notifications", "{count} notifications"))
+            message = template.format(count=len(items))
+
+        self._sent.setdefault(user, deque()).append(time.monotonic())
+        try:
+            self.sink(title, message)
+        except Exception:
+            logger.exception("Could not show notification %r", title)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def dispatcher():
+    """The NotificationDispatcher shared by the whole app."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+        return _dispatcher
 
-from plyer import notification
 
 def send_notification(title, message):
-    notification.notify(
-        title = title,
-        message = message,
-        timeout = 5
-        
-    )
\ No newline at end of file
+    dispatcher().notify(None, "message", title, message)
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+# bcrypt cost factor: every +1 doubles the time a hash or a check takes.
+DEFAULT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+# Workers are started from a clean process rather than forked from the
+# backend, which has threads and open database connections by then.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def is_bcrypt_hash(value):
+    return isinstance(value, str) and value.startswith(BCRYPT_PREFIXES)
+
+
+def hash_password(password, rounds=DEFAULT_ROUNDS):
+    """Hash a password with bcrypt at the given cost."""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def check_password(password, stored):
+    """Check a password against its stored bcrypt hash.
+
+    Accounts created before passwords were hashed still hold the plain text;
+    those are compared in constant time so they can log in and be upgraded.
+    """
+    if is_bcrypt_hash(stored):
+        return bcrypt.checkpw(password.encode(), stored.encode())
+    return hmac.compare_digest(password.encode(), (stored or "").encode())
+
+
+def needs_rehash(stored, rounds=DEFAULT_ROUNDS):
+    """True for plain-text passwords and hashes made with a different cost."""
+    if not is_bcrypt_hash(stored):
+        return True
+    return int(stored.split("$")[2]) != rounds
+
+
+class PasswordHasher:
+    """Hash and verify passwords in a process pool, away from the event loop.
+
+    bcrypt is deliberately slow and holds the CPU for the whole call, so it
+    runs in worker processes where it neither blocks request handling nor
+    competes for the GIL.  Successful verifications are remembered for a few
+    seconds, keyed by a keyed digest of the credentials, so a burst of logins
+    for the same account costs one bcrypt check instead of many.
+    """
+
+    def __init__(self, rounds=DEFAULT_ROUNDS, workers=None, cache_ttl=30.0, cache_size=1024):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+
+        self._executor = None
+        self._cache = OrderedDict()  # digest -> expiry time
+        self._cache_key = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Started on first use so importing the backend doesn't fork.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context(START_METHOD))
+        return self._executor
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), fn, *args)
+
+    async def hash(self, password):
+        """Hash a new password at the configured cost."""
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, username, password, stored):
+        """Check a password against the stored hash, using the short-lived cache."""
+        # The stored hash is part of the key, so a password change never hits old entries.
+        digest = hmac.new(
+            self._cache_key, "\0".join((username, password, stored)).encode(), hashlib.sha256
+        ).digest()
+
+        now = time.monotonic()
+        with self._lock:
+            expires = self._cache.get(digest)
+            if expires is not None:
+                if expires > now:
+                    return True
+                del self._cache[digest]
+
+        if not is_bcrypt_hash(stored):
+            ok = check_password(password, stored)  # Plain text, nothing to offload
+        else:
+            ok = await self._run(check_password, password, stored)
+
+        if ok and self.cache_ttl > 0:
+            with self._lock:
+                self._cache[digest] = now + self.cache_ttl
+                self._cache.move_to_end(digest)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return ok
+
+    def needs_rehash(self, stored):
+        return needs_rehash(stored, self.rounds)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
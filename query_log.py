@@ -0,0 +1,148 @@
+"""Slow-query log for ``Database`` and a report over it.
+
+Tracing is opt-in: give a Database a ``SlowQueryLog`` as its tracer and
+every statement slower than the threshold is written, with the method that
+ran it and its EXPLAIN QUERY PLAN, as one JSON line to a rotating log file.
+Statements are logged with their literals replaced by ``?``, so usernames,
+search terms and password hashes never reach the file.
+
+    db.tracer = SlowQueryLog("slow_queries.log", threshold=0.05)
+
+The report groups the logged statements by their SQL, worst total time
+first:
+
+    python -m query_log slow_queries.log --top 20
+    python -m query_log slow_queries.log --sort max --method search_task
+"""
+import argparse
+import glob
+import json
+import logging
+import logging.handlers
+import re
+import time
+from collections import defaultdict
+
+from database import explain
+
+DEFAULT_THRESHOLD = 0.1  # Seconds
+
+
+class SlowQueryLog:
+    """A ``Database.tracer`` that logs statements slower than ``threshold`` seconds."""
+
+    def __init__(self, path, threshold=DEFAULT_THRESHOLD, max_bytes=10_000_000, backup_count=5):
+        self.path = path
+        self.threshold = threshold
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def __call__(self, statements, conn):
+        for statement in statements:
+            if statement.seconds < self.threshold:
+                continue
+            entry = {
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "method": statement.method,
+                "seconds": round(statement.seconds, 6),
+                "steps": statement.steps,
+                "sql": normalize(statement.sql),
+                "plan": explain(conn, statement.sql),  # Planned with the real values
+            }
+            # Through the handler, which serializes writers and rotates the file.
+            self._handler.handle(logging.makeLogRecord({"msg": json.dumps(entry)}))
+
+    def close(self):
+        self._handler.close()
+
+
+def normalize(sql):
+    """The shape of a statement: literals replaced by ? and whitespace collapsed."""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    return " ".join(sql.split())
+
+
+def read_entries(path):
+    """Every entry in the log at ``path`` and its rotated files, oldest file first."""
+    # RotatingFileHandler keeps path.1 (newest) to path.N (oldest).
+    rotated = []
+    for name in glob.glob(glob.escape(path) + ".*"):
+        suffix = name[len(path) + 1:]
+        if suffix.isdigit():
+            rotated.append((int(suffix), name))
+    for name in [name for _, name in sorted(rotated, reverse=True)] + [path]:
+        try:
+            f = open(name, encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by a crash
+
+
+def aggregate(entries, method=None):
+    """Group entries by statement shape. Returns a list of summary dicts.
+
+    Entries are normalized again, for logs written before they were redacted.
+    """
+    groups = defaultdict(list)
+    for entry in entries:
+        if method and entry.get("method") != method:
+            continue
+        groups[normalize(entry["sql"])].append(entry)
+
+    report = []
+    for shape, group in groups.items():
+        times = sorted(entry["seconds"] for entry in group)
+        worst = max(group, key=lambda entry: entry["seconds"])
+        report.append({
+            "sql": shape,
+            "methods": sorted({entry.get("method") or "-" for entry in group}),
+            "count": len(group),
+            "total": sum(times),
+            "mean": sum(times) / len(times),
+            "p95": times[min(len(times) - 1, int(0.95 * len(times)))],
+            "max": times[-1],
+            "steps": max(entry.get("steps", 0) for entry in group),
+            "plan": worst.get("plan", []),
+        })
+    return report
+
+
+def print_report(report, top):
+    print(f"{'count':>7} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9} {'steps':>9}  method")
+    for row in report[:top]:
+        print(f"{row['count']:>7} {row['total']:>9.2f} {row['mean'] * 1000:>9.1f} {row['p95'] * 1000:>9.1f} "
+              f"{row['max'] * 1000:>9.1f} {row['steps']:>9}  {', '.join(row['methods'])}")
+        print(f"        {row['sql'][:200]}")
+        for detail in row["plan"]:
+            print(f"          plan: {detail}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="the slow-query log; rotated files next to it are read too")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--sort", choices=["total", "count", "mean", "p95", "max", "steps"], default="total")
+    parser.add_argument("--method", help="only statements run by this Database method")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = aggregate(read_entries(args.path), args.method)
+    report.sort(key=lambda row: row[args.sort], reverse=True)
+    if args.json:
+        print(json.dumps(report[:args.top], indent=2))
+    elif not report:
+        print("No slow queries logged.")
+    else:
+        print_report(report, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton,QCheckBox,QMessageBox
 from password_line_edit import PasswordLineEdit
 from api_client import APIClient 
+from workers import api_runner
 
 
 class RegisterWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.api = APIClient()
+        self.runner = api_runner()
         self.setWindowTitle("Register")
         self.resize(300, 200)
         
@@ -70,9 +72,9 @@ class RegisterWindow(QWidget):
         self.admin_checkbox = QCheckBox("Register as Admin")
         layout.addWidget(self.admin_checkbox)
 
-        register_button = QPushButton("Register")
-        register_button.clicked.connect(self.register_user)
-        layout.addWidget(register_button)
+        self.register_button = QPushButton("Register")
+        self.register_button.clicked.connect(self.register_user)
+        layout.addWidget(self.register_button)
 
         self.setLayout(layout)
         
@@ -90,11 +92,19 @@ class RegisterWindow(QWidget):
 
         role = "admin" if self.admin_checkbox.isChecked() else "user"
 
-        try:
-            self.api.insert_user(username, password, role)
-            QMessageBox.information(self, "Success", "User registered successfully!")
-            self.close()  # Close the registration window after successful registration
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Registration failed: {str(e)}")
+        self.register_button.setEnabled(False)
+        self.runner.submit(
+            ("register", username), self.api.insert_user, username, password, role,
+            on_result=self.on_registered, on_error=self.on_register_error,
+        )
+
+    def on_registered(self, result):
+        self.register_button.setEnabled(True)
+        QMessageBox.information(self, "Success", "User registered successfully!")
+        self.close()  # Close the registration window after successful registration
+
+    def on_register_error(self, e):
+        self.register_button.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Registration failed: {str(e)}")
 
     
\ No newline at end of file
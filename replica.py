@@ -0,0 +1,175 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Where each user's replica is kept between runs.
+REPLICA_DIR = os.environ.get("TASK_MANAGER_HOME") or os.path.join(os.path.expanduser("~"), ".task_manager")
+
+
+def replica_path(base_url, username):
+    """The replica file for ``username`` on the backend at ``base_url``."""
+    server = re.sub(r"^\w+://", "", base_url)
+    name = re.sub(r"[^\w.-]+", "_", f"{username}@{server}")
+    return os.path.join(REPLICA_DIR, f"{name}.sqlite3")
+
+
+class Replica:
+    """The client's local copy of the tasks and users it can see.
+
+    Kept current by applying ``GET /sync`` deltas, so a refresh only transfers
+    what changed since the last one, and stored in SQLite so it is still there
+    when the backend is not.  Status changes made locally wait in ``outbox``
+    until they are sent; until then reads show the local status over the
+    server's.  Each queued change remembers the server version of the task it
+    was made against, so the backend can reject it if the task has changed
+    since.
+    """
+
+    def __init__(self, path=":memory:"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        # Synced on worker threads and read on the UI thread, one at a time.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id INTEGER PRIMARY KEY,
+                username TEXT,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                status TEXT NOT NULL,
+                version INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_username ON tasks(username);
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                role TEXT NOT NULL
+            );
+            -- One pending change per task; a newer status replaces an unsent one.
+            CREATE TABLE IF NOT EXISTS outbox (
+                task_id INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                base_version INTEGER,
+                queued_at REAL NOT NULL
+            );
+        ''')
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock, self._conn:
+            yield self._conn
+
+    @property
+    def version(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def clear(self):
+        """Forget everything, including changes that were never sent."""
+        with self._transaction() as conn:
+            for table in ("meta", "tasks", "users", "outbox"):
+                conn.execute(f"DELETE FROM {table}")
+
+    def close(self):
+        self._conn.close()
+
+    def apply(self, changes):
+        """Apply one ``/sync`` response. Returns the number of tasks and users it touched."""
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO tasks VALUES (:task_id, :username, :title, :description, :status, :version)",
+                changes["tasks"],
+            )
+            conn.executemany("DELETE FROM tasks WHERE task_id = ?", [(i,) for i in changes["deleted_tasks"]])
+            conn.executemany("INSERT OR REPLACE INTO users VALUES (:user_id, :username, :role)", changes["users"])
+            conn.executemany("DELETE FROM users WHERE user_id = ?", [(i,) for i in changes["deleted_users"]])
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (changes["version"],))
+        return sum(len(changes[key]) for key in ("tasks", "deleted_tasks", "users", "deleted_users"))
+
+    def tasks(self, username=None):
+        """Tasks as the user should see them: with their own unsent changes applied."""
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT tasks.task_id, tasks.username, tasks.title, tasks.description,
+                       COALESCE(outbox.status, tasks.status), outbox.task_id IS NOT NULL
+                FROM tasks
+                LEFT JOIN outbox ON outbox.task_id = tasks.task_id
+                WHERE :username IS NULL OR tasks.username = :username
+                ORDER BY tasks.task_id
+            ''', {"username": username}).fetchall()
+        return [
+            {"task_id": task_id, "username": owner, "title": title, "description": description,
+             "status": status, "pending": bool(pending)}
+            for task_id, owner, title, description, status, pending in rows
+        ]
+
+    def users(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, username, role FROM users ORDER BY username").fetchall()
+        return [{"user_id": user_id, "username": username, "role": role} for user_id, username, role in rows]
+
+    # --- Outbox ---
+
+    def queue_status(self, task_id, status):
+        """Record a status change to send later. Returns False for tasks the replica doesn't have."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT version FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                return False
+            # Keep the first base_version: the change is still relative to what the user saw then.
+            conn.execute('''
+                INSERT INTO outbox(task_id, status, base_version, queued_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(task_id) DO UPDATE SET status = excluded.status
+            ''', (task_id, status, row[0], time.time()))
+        return True
+
+    def pending(self, limit=100):
+        """The oldest unsent changes, as ``/tasks/status/batch`` updates."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id, status, base_version FROM outbox ORDER BY queued_at LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"task_id": task_id, "status": status, "base_version": base_version}
+                for task_id, status, base_version in rows]
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def resolve(self, sent, results):
+        """Take the backend's answers for the ``sent`` updates out of the outbox.
+
+        Applied changes and conflicts both leave the server's copy of the task
+        in the replica.  On a conflict the server wins and the local change is
+        dropped; a change queued again while an applied one was in flight
+        stays, rebased on the version the backend just returned.
+        """
+        sent_status = {update["task_id"]: update["status"] for update in sent}
+        with self._transaction() as conn:
+            for result in results:
+                task_id, task = result["task_id"], result["task"]
+                if task is None:  # Deleted on the server
+                    conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO tasks VALUES (:task_id, :username, :title, :description, :status, :version)",
+                        task,
+                    )
+
+                if result["result"] == "applied":
+                    conn.execute("DELETE FROM outbox WHERE task_id = ? AND status = ?",
+                                 (task_id, sent_status.get(task_id)))
+                    conn.execute("UPDATE outbox SET base_version = ? WHERE task_id = ?", (task["version"], task_id))
+                else:
+                    conn.execute("DELETE FROM outbox WHERE task_id = ?", (task_id,))
@@ -0,0 +1,71 @@
+import secrets
+import threading
+from collections import OrderedDict, defaultdict
+
+GLOBAL_SCOPE = "all"
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header names ``etag`` (weak comparison, as for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    """Serialized GET responses, tagged with the version of the data they came from.
+
+    Data is versioned per scope: ``user:<name>`` for one user's tasks and
+    ``all`` for anything that spans users.  A write bumps the versions of the
+    users it touched and the global one, which changes the ETag of every
+    response built from that data and so retires their cache entries.
+    Reads of other users' data keep their ETags and stay cached.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._boot = secrets.token_hex(4)  # ETags from before a restart never match
+        self._versions = defaultdict(int)  # scope -> version
+        self._entries = OrderedDict()      # key -> (etag, body)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def user_scope(username):
+        return f"user:{username}"
+
+    def etag(self, scope):
+        with self._lock:
+            return f'"{self._boot}-{self._versions[scope]}"'
+
+    def invalidate(self, *usernames):
+        """Record a write that changed the given users' data."""
+        with self._lock:
+            self._versions[GLOBAL_SCOPE] += 1
+            for username in usernames:
+                self._versions[self.user_scope(username)] += 1
+
+    def get(self, key, etag):
+        """The cached body for ``key`` if it was built at version ``etag``, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, etag, body):
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,48 @@
+"""JSON responses for the backend's listing routes.
+
+Listings are serialized straight from the Task and User objects the
+Database returns, skipping FastAPI's jsonable_encoder and Pydantic.  orjson
+is used when it is installed; otherwise the stdlib encoder in models.py
+gives the same output, only slower.
+"""
+from fastapi.responses import Response
+
+from models import dumps, json_default
+
+try:
+    import orjson
+except ImportError:  # Optional: pip install orjson
+    orjson = None
+
+
+def orjson_dumps(value):
+    """UTF-8 JSON for ``value``, which may contain Task and User objects, through orjson."""
+    # Dataclasses go through the same encoder as the stdlib path, so both
+    # leave out the fields a query did not read.
+    return orjson.dumps(value, default=json_default, option=orjson.OPT_PASSTHROUGH_DATACLASS)
+
+
+def stdlib_dumps(value):
+    """UTF-8 JSON for ``value``, which may contain Task and User objects, through the json module."""
+    return dumps(value).encode()
+
+
+dumps_bytes = orjson_dumps if orjson is not None else stdlib_dumps
+
+
+def ndjson_chunk(items):
+    """One JSON document per line, for a streamed listing."""
+    return b"".join(dumps_bytes(item) + b"\n" for item in items)
+
+
+class FastJSONResponse(Response):
+    """A JSON response for content the backend built itself and so trusts.
+
+    Return an instance from a route: a plain return value would still be run
+    through jsonable_encoder first.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps_bytes(content)
@@ -0,0 +1,73 @@
+import re
+import time
+from collections import OrderedDict
+
+
+def normalize_query(text):
+    """Lower-case words of a query, joined by single spaces."""
+    return " ".join(re.findall(r"\w+", (text or "").lower()))
+
+
+def matches(task, query):
+    """Client-side version of the backend's full-text match.
+
+    Every word of ``query`` has to be the prefix of some word in the task's
+    title or description, as with the FTS5 query built by
+    ``database.build_match_query``.
+    """
+    words = query.split()
+    if not words:
+        return True
+    tokens = re.findall(r"\w+", f"{task.get('title', '')} {task.get('description', '')}".lower())
+    return all(any(token.startswith(word) for token in tokens) for word in words)
+
+
+class PrefixSearchCache:
+    """Per-user cache of task search results that answers refinements locally.
+
+    Typing only ever narrows a prefix search: the tasks matching "repo bu" are
+    a subset of those matching "rep".  So once the complete result set for a
+    query is cached, any query that extends it is answered by filtering that
+    set, and the server is only asked when no complete ancestor is cached.
+    Results the server truncated at its limit are still cached for exact
+    repeats but never filtered, since the missing rows might match.
+    """
+
+    def __init__(self, max_entries=64, ttl=30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (username, query) -> (expires, complete, tasks)
+
+    def put(self, username, query, tasks, complete=True):
+        key = (username, normalize_query(query))
+        self._entries[key] = (time.monotonic() + self.ttl, complete, list(tasks))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, username, query):
+        """Return the cached or locally filtered results, or None on a miss."""
+        query = normalize_query(query)
+        now = time.monotonic()
+        best = None
+        for key, (expires, complete, tasks) in list(self._entries.items()):
+            if expires <= now:
+                del self._entries[key]
+                continue
+            cached_user, cached_query = key
+            if cached_user != username:
+                continue
+            if cached_query == query:
+                self._entries.move_to_end(key)
+                return tasks
+            if complete and query.startswith(cached_query):
+                # Prefer the longest cached query: it has the fewest rows to filter.
+                if best is None or len(cached_query) > len(best[0]):
+                    best = (cached_query, tasks)
+
+        if best is None:
+            return None
+        return [task for task in best[1] if matches(task, query)]
+
+    def clear(self):
+        self._entries.clear()
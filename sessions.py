@@ -0,0 +1,114 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+Session = namedtuple("Session", "user_id username role issued_at expires_at")
+
+
+class InvalidToken(Exception):
+    """Raised for tokens that are malformed, forged, expired or revoked."""
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class SessionManager:
+    """Issue and validate signed session tokens.
+
+    A token is an HMAC-SHA256 signed payload carrying the user id, name and
+    role, so validating one needs no database access.  Tokens that have been
+    seen before are served from an in-memory LRU cache, which skips the HMAC
+    and JSON work as well.  Revoking a user invalidates every token issued to
+    them up to that moment.
+    """
+
+    def __init__(self, secret=None, ttl=8 * 60 * 60, cache_size=10000):
+        if secret is None:
+            secret = os.environ.get("TASK_MANAGER_SECRET") or secrets.token_hex(32)
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.ttl = ttl
+        self.cache_size = cache_size
+
+        self._cache = OrderedDict()  # token -> Session, least recently used first
+        self._revoked = {}           # user_id -> time of revocation
+        self._lock = threading.Lock()
+
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self.secret, payload.encode(), hashlib.sha256).digest())
+
+    def issue(self, user_id, username, role):
+        """Create a token for a user who has just proven their credentials."""
+        now = time.time()
+        claims = {
+            "uid": user_id,
+            "usr": username,
+            "rol": role,
+            "iat": now,
+            "exp": now + self.ttl,
+            "jti": secrets.token_hex(8),
+        }
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    def validate(self, token):
+        """Return the Session for ``token`` or raise InvalidToken."""
+        now = time.time()
+        with self._lock:
+            session = self._cache.get(token)
+            if session is not None:
+                self._cache.move_to_end(token)
+
+        if session is None:
+            session = self._decode(token)
+            with self._lock:
+                self._cache[token] = session
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        if session.expires_at <= now:
+            self._forget(token)
+            raise InvalidToken("Session expired.")
+
+        revoked_at = self._revoked.get(session.user_id)
+        if revoked_at is not None and session.issued_at <= revoked_at:
+            self._forget(token)
+            raise InvalidToken("Session revoked.")
+
+        return session
+
+    def _decode(self, token):
+        if not token.isascii():  # compare_digest raises TypeError on other str
+            raise InvalidToken("Malformed token.")
+        payload, _, signature = token.partition(".")
+        if not signature or not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidToken("Bad token signature.")
+        try:
+            claims = json.loads(_b64decode(payload))
+            return Session(claims["uid"], claims["usr"], claims["rol"], claims["iat"], claims["exp"])
+        except (ValueError, KeyError, TypeError):
+            raise InvalidToken("Malformed token.")
+
+    def _forget(self, token):
+        with self._lock:
+            self._cache.pop(token, None)
+
+    def revoke_user(self, user_id):
+        """Invalidate every token issued to ``user_id`` so far."""
+        now = time.time()
+        with self._lock:
+            self._revoked[user_id] = now
+            # Entries older than the token lifetime can no longer match anything.
+            cutoff = now - self.ttl
+            for stale in [uid for uid, at in self._revoked.items() if at < cutoff]:
+                del self._revoked[stale]
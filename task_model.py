@@ -0,0 +1,131 @@
+from operator import attrgetter
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt, pyqtSignal
+
+from models import Task
+
+
+class TaskTableModel(QAbstractTableModel):
+    """Tasks for a QTableView, fetched a page at a time as the view scrolls.
+
+    In listing mode the view asks for more rows through ``canFetchMore`` and
+    ``fetchMore`` only when the user scrolls near the end, and each request
+    fetches the next keyset page of ``GET /tasks/all`` in the background.  Rows
+    are kept as slotted Task objects to hold as little per task as possible.
+    """
+
+    COLUMNS = ("User", "Title", "Description", "Status")
+    TaskRole = Qt.ItemDataRole.UserRole + 1
+
+    # The Task field shown in each column.
+    FIELDS = tuple(attrgetter(name) for name in ("username", "title", "description", "status"))
+
+    page_loaded = pyqtSignal(int)  # Number of rows the page added
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, api, runner, page_size=200, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.runner = runner
+        self.page_size = page_size
+        self._channel = f"task_model:{id(self)}"
+
+        self._rows = []
+        self._cursor = None
+        self._exhausted = False
+        self._loading = False
+
+    def reset(self):
+        """Drop every row and page through all tasks from the start again."""
+        self.runner.cancel(self._channel)
+        self.beginResetModel()
+        self._rows = []
+        self._cursor = None
+        self._exhausted = False
+        self._loading = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def set_tasks(self, tasks, default_username=None):
+        """Show a fixed list of tasks, such as search results, instead of paging."""
+        self.runner.cancel(self._channel)
+        self.beginResetModel()
+        self._rows = [Task.from_dict(task, default_username) for task in tasks]
+        self._exhausted = True
+        self._loading = False
+        self.endResetModel()
+
+    def task_at(self, row):
+        return self._rows[row]
+
+    def remove_task(self, task_id):
+        for row, task in enumerate(self._rows):
+            if task.task_id == task_id:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+                return
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.FIELDS[index.column()](task)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return task.description
+        if role == self.TaskRole:
+            return task
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._loading = True
+        self.runner.submit_latest(
+            self._channel, self.api.list_tasks, self._cursor, self.page_size,
+            on_result=self._append_page, on_error=self._page_failed,
+        )
+
+    def _append_page(self, page):
+        tasks, next_cursor = page
+        self._loading = False
+        self._cursor = next_cursor
+        self._exhausted = next_cursor is None
+        if tasks:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(tasks) - 1)
+            self._rows.extend(Task.from_dict(task) for task in tasks)
+            self.endInsertRows()
+        self.page_loaded.emit(len(tasks))
+
+    def _page_failed(self, error):
+        self._loading = False
+        self._exhausted = True  # Stop the view from retrying on every scroll
+        self.load_failed.emit(str(error))
+
+
+class TaskFilterProxyModel(QSortFilterProxyModel):
+    """Sorts and filters the loaded tasks across every column, ignoring case."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterKeyColumn(-1)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setSortCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
@@ -9,11 +9,10 @@ def client():
     db = Database()
     
     # Clean up users and tasks before each test
-    conn = db.get_connection()
-    c = conn.cursor()
-    c.execute("DELETE FROM tasks")
-    c.execute("DELETE FROM users")
-    conn.commit()
+    with db.connection() as conn:
+        conn.execute("DELETE FROM tasks")
+        conn.execute("DELETE FROM users")
+    db.close()
     
     return TestClient(app)
 
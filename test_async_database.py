@@ -0,0 +1,60 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from async_database import AsyncDatabase
+from database import Database
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "test.db"), pool_size=3)
+    database.insert_user("user1", "password1", "user")
+    yield database
+    database.close()
+
+
+def test_reads_and_writes_run_on_their_own_threads(db):
+    calls = []
+    db.listeners.append(lambda call: calls.append((call.method, threading.current_thread().name, request_id.get())))
+    adb = AsyncDatabase(db)
+
+    async def run():
+        request_id.set("req-1")
+        await adb.assign_task("user1", "Report", "Write it")
+        task_id = await adb.fetch_task_id("user1", "Report")
+        assert (await adb.get_task(task_id)).title == "Report"
+
+    try:
+        asyncio.run(run())
+    finally:
+        adb.shutdown()
+
+    assert [(method, thread.split("_")[0], rid) for method, thread, rid in calls] == [
+        ("assign_task", "db-write", "req-1"),
+        ("fetch_task_id", "db-read", "req-1"),
+        ("get_task", "db-read", "req-1"),
+    ]
+
+
+def test_readers_leave_a_connection_for_the_writer(db):
+    adb = AsyncDatabase(db, readers=8)
+    assert adb.readers == db.pool.max_size - 1 == 2
+    adb.shutdown()
+
+    memory = Database(":memory:")
+    adb = AsyncDatabase(memory)
+    assert adb.readers == 1  # One shared connection, but at least one reader
+    adb.shutdown()
+    memory.close()
+
+
+def test_unknown_methods_are_not_forwarded(db):
+    adb = AsyncDatabase(db)
+    with pytest.raises(AttributeError):
+        adb.create_tables
+    adb.shutdown()
@@ -0,0 +1,63 @@
+import asyncio
+
+from change_feed import ChangeFeed
+
+
+def publish(feed, count, username="bob"):
+    for i in range(count):
+        feed.publish("task_created", {"task_id": i}, username)
+
+
+def test_resume_replays_missed_events_for_the_topic():
+    feed = ChangeFeed()
+    publish(feed, 2)
+    publish(feed, 1, username="alice")
+    publish(feed, 1)
+
+    _, backlog = feed.subscribe({"user:bob"}, since=1)
+    assert [event["seq"] for event in backlog] == [2, 4]
+
+    _, backlog = feed.subscribe({"all"}, since=feed.last_seq)
+    assert backlog == []
+
+
+def test_reset_when_history_no_longer_covers_since():
+    feed = ChangeFeed(history=3)
+    publish(feed, 5)
+
+    _, backlog = feed.subscribe({"all"}, since=1)
+    assert backlog == [{"seq": 5, "type": "reset"}]
+
+    _, backlog = feed.subscribe({"all"}, since=2)  # Events 3 to 5 are all still there
+    assert [event["seq"] for event in backlog] == [3, 4, 5]
+
+
+def test_reset_when_since_is_ahead_of_the_feed():
+    feed = ChangeFeed()  # A restarted server starts counting from 0 again
+    publish(feed, 2)
+
+    _, backlog = feed.subscribe({"all"}, since=40)
+    assert backlog == [{"seq": 2, "type": "reset"}]
+
+
+def test_subscriber_that_falls_behind_is_cut_off():
+    feed = ChangeFeed(queue_size=2)
+    subscription, _ = feed.subscribe({"all"})
+    publish(feed, 3)
+    assert subscription.overflowed
+    assert asyncio.run(subscription.get(timeout=0.01)) is None
+
+    subscription.close()
+    publish(feed, 1)
+    assert subscription.queue.qsize() == 2  # Closed subscriptions get nothing more
+
+
+def test_subscriber_receives_events_for_its_topics_only():
+    feed = ChangeFeed()
+    subscription, _ = feed.subscribe({"user:bob"})
+    publish(feed, 1, username="alice")
+    publish(feed, 1)
+
+    event = asyncio.run(subscription.get(timeout=1))
+    assert event["seq"] == 2 and event["username"] == "bob"
+    assert asyncio.run(subscription.get(timeout=0.01)) is None
@@ -0,0 +1,202 @@
+import threading
+
+import pytest
+
+from database import Database, PoolTimeoutError
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "test.db"), pool_size=2)
+    database.insert_user("user1", "password1", "user")
+    yield database
+    database.close()
+
+
+def test_pool_reuses_connections(db):
+    for i in range(50):
+        db.assign_task("user1", f"task{i}", "test task")
+        db.search_task("user1", "task")
+        db.fetch_task_id("user1", f"task{i}")
+
+    stats = db.pool.stats()
+    assert stats["open"] <= 2
+    assert stats["in_use"] == 0
+    assert stats["checkouts"] > 150
+
+
+def test_pool_is_bounded(db):
+    db.pool.timeout = 0.05
+    with db.connection(), db.connection():
+        with pytest.raises(PoolTimeoutError):
+            db.pool.acquire()
+    assert db.pool.stats()["timeouts"] == 1
+
+
+def test_pool_waits_for_released_connection(db):
+    db.pool.timeout = 5
+    first = db.pool.acquire()
+    second = db.pool.acquire()
+    threading.Timer(0.05, db.pool.release, args=(first,)).start()
+
+    conn = db.pool.acquire()
+    assert conn is first
+    db.pool.release(conn)
+    db.pool.release(second)
+    assert db.pool.stats()["max_wait_seconds"] > 0
+
+
+def test_connection_rolls_back_on_error(db):
+    with pytest.raises(RuntimeError):
+        with db.connection() as conn:
+            conn.execute("UPDATE users SET role = 'admin' WHERE username = 'user1'")
+            raise RuntimeError("boom")
+
+    assert db.get_user_role("user1") == "user"
+
+
+def test_memory_database_shares_one_connection():
+    database = Database(":memory:")
+    database.insert_user("user1", "password1", "admin")
+    assert database.get_user_role("user1") == "admin"
+    assert database.pool.stats()["max_size"] == 1
+
+
+def test_hot_queries_use_indexes(db):
+    plans = db.check_query_plans()
+    assert plans
+    for name, details in plans.items():
+        assert not [d for d in details if d.startswith("SCAN")], name
+
+
+def test_full_text_search_ranks_and_highlights(db):
+    db.assign_task("user1", "Report bug in login", "Crash when password is empty")
+    db.assign_task("user1", "Write docs", "Document the bug report workflow")
+    db.assign_task("user1", "Deploy", "Ship the release")
+
+    results = db.full_text_search("rep bu", username="user1")
+    assert [r["title"] for r in results] == ["Report bug in login", "Write docs"]
+    assert results[0]["highlight"]["title"] == "[Report] [bug] in login"
+
+    db.update_task_status(results[0]["task_id"], "Completed")
+    db.delete_task("Write docs")
+    results = db.full_text_search("bug")
+    assert [(r["title"], r["status"]) for r in results] == [("Report bug in login", "Completed")]
+
+
+def test_delete_task_by_id_spares_tasks_with_the_same_title(db):
+    db.insert_user("user2", "password2", "user")
+    db.assign_task("user1", "Report", "First")
+    db.assign_task("user2", "Report", "Second")
+    second = db.fetch_task_id("user2", "Report")
+
+    assert db.delete_task("Report", second).description == "Second"
+    assert db.delete_task("Report", second) is None
+    assert db.delete_task("Other", db.fetch_task_id("user1", "Report")) is None  # The title must match too
+    assert [task.description for task in db.search_task("user1", "Report")] == ["First"]
+
+
+def test_full_text_search_without_fts5_falls_back_to_like(db):
+    db.insert_user("user2", "password2", "user")
+    db.assign_task("user1", "Report bug", "Crash on login")
+    db.assign_task("user2", "Write docs", "Explain the login flow")
+    db.assign_task("user2", "Deploy", "Ship it")
+    db.fts_enabled = False  # As on an SQLite build without FTS5
+
+    assert [r["title"] for r in db.full_text_search("login")] == ["Report bug", "Write docs"]
+    assert [r["title"] for r in db.full_text_search("login", username="user2")] == ["Write docs"]
+    assert len(db.full_text_search("", limit=2)) == 2
+
+
+def test_full_text_search_indexes_existing_tasks(tmp_path):
+    path = str(tmp_path / "old.db")
+    database = Database(path)
+    database.insert_user("user1", "password1", "user")
+    with database.connection() as conn:
+        conn.execute("DROP TABLE tasks_fts")
+        for trigger in ("tasks_fts_insert", "tasks_fts_delete", "tasks_fts_update"):
+            conn.execute(f"DROP TRIGGER {trigger}")
+    database.assign_task("user1", "Legacy task", "Added before the index existed")
+    database.close()
+
+    database = Database(path)
+    assert [r["title"] for r in database.full_text_search("legacy")] == ["Legacy task"]
+    assert database.full_text_search('"quoted" OR NOT') == []
+    database.close()
+
+
+def test_assign_tasks_bulk(db):
+    db.insert_user("user2", "password2", "user")
+    db.assign_task("user1", "existing", "already there")
+
+    results = db.assign_tasks_bulk([
+        {"username": "user1", "title": "new", "description": "d"},
+        {"username": "user1", "title": "existing", "description": "d"},
+        {"username": "ghost", "title": "new", "description": "d"},
+        {"username": "user2", "title": "new", "description": "d", "status": "Completed"},
+        {"username": "user1", "title": "new", "description": "again"},
+    ])
+
+    assert [r["result"] for r in results] == ["created", "duplicate", "user_not_found", "created", "duplicate"]
+    assert [(task.title, task.description, task.status) for task in db.search_task("user2", "new")] == [
+        ("new", "d", "Completed")]
+    assert results[0]["task_id"] == db.fetch_task_id("user1", "new")
+    assert results[1]["task_id"] is None
+    assert len(db.search_task("user1", "")) == 2
+    assert db.assign_tasks_bulk([]) == []
+
+
+def test_list_tasks_page_walks_every_task_once(db):
+    db.insert_user("user0", "password0", "user")
+    db.assign_tasks_bulk([
+        {"username": username, "title": f"task{i}", "description": "d"}
+        for i in range(7) for username in ("user1", "user0")
+    ])
+
+    seen = []
+    page = db.list_tasks_page(limit=3)
+    while page:
+        seen.extend((task.username, task.task_id) for task in page)
+        last = page[-1]
+        page = db.list_tasks_page((last.username, last.task_id), limit=3)
+
+    assert len(seen) == 14
+    assert seen == sorted(seen)
+
+
+def test_changes_since_returns_net_changes(db):
+    db.insert_user("user2", "password2", "user")
+    db.assign_task("user1", "first", "test task")
+    db.assign_task("user2", "second", "test task")
+    full = db.changes_since(0)
+    assert {task.title for task in full["tasks"]} == {"first", "second"}
+    assert {user.username for user in full["users"]} == {"user1", "user2"}
+
+    first_id = db.fetch_task_id("user1", "first")
+    second_id = db.fetch_task_id("user2", "second")
+    db.update_task_status(first_id, "Completed")
+    db.update_task_status(first_id, "Pending")
+    db.delete_task("second")
+
+    delta = db.changes_since(full["version"])
+    assert [task.task_id for task in delta["tasks"]] == [first_id]  # Once, however often it changed
+    assert delta["deleted_tasks"] == [second_id]
+    assert delta["users"] == []
+    assert db.changes_since(delta["version"])["tasks"] == []
+
+    own = db.changes_since(full["version"], user_id=db.get_user_auth("user1")[0])
+    assert own["deleted_tasks"] == []
+
+
+def test_changes_since_pages(db):
+    for i in range(5):
+        db.assign_task("user1", f"task{i}", "test task")
+
+    version, seen = 0, 0
+    while True:
+        changes = db.changes_since(version, limit=2)
+        seen += len(changes["tasks"]) + len(changes["users"])
+        version = changes["version"]
+        if not changes["more"]:
+            break
+    assert seen == 6
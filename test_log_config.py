@@ -0,0 +1,35 @@
+import io
+import json
+import logging
+
+from log_config import SAMPLED, configure_logging, shutdown_logging
+
+
+def test_sampled_debug_records_are_thinned_and_written_as_json():
+    stream = io.StringIO()
+    configure_logging("DEBUG", fmt="json", sample_every=10, stream=stream)
+    log = logging.getLogger("test_log_config")
+    try:
+        for i in range(25):
+            log.debug("Task %s updated", i, extra=SAMPLED)
+        log.info("Listed %d users", 3, extra={"route": "/users/"})
+    finally:
+        shutdown_logging()
+
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [entry["message"] for entry in entries] == [
+        "Task 0 updated", "Task 10 updated", "Task 20 updated", "Listed 3 users"]
+    assert entries[0]["sample_rate"] == 10
+    assert entries[-1]["route"] == "/users/" and entries[-1]["level"] == "INFO"
+
+
+def test_debug_arguments_are_not_formatted_above_debug():
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("formatted")
+
+    configure_logging("INFO", stream=io.StringIO())
+    try:
+        logging.getLogger("test_log_config").debug("%s", Expensive())
+    finally:
+        shutdown_logging()
@@ -0,0 +1,253 @@
+import importlib
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def backend(tmp_path_factory):
+    # The backend opens its database on import.
+    os.environ["TASK_MANAGER_DB"] = str(tmp_path_factory.mktemp("backend") / "test.db")
+    try:
+        backend = importlib.import_module("main_backend")
+    finally:
+        del os.environ["TASK_MANAGER_DB"]
+    backend.hasher.rounds = 4  # bcrypt's minimum cost, to keep the tests fast
+    yield backend
+    backend.hasher.shutdown()
+
+
+@pytest.fixture
+def client(backend):
+    with backend.db.connection() as conn:
+        conn.execute("DELETE FROM tasks")
+        conn.execute("DELETE FROM users")
+    return TestClient(backend.app)
+
+
+def login(client, username, role="user"):
+    """Register ``username`` and return the headers of a session for them."""
+    client.post("/users/", json={"username": username, "password": "pw", "role": role})
+    token = client.post("/login", json={"username": username, "password": "pw"}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_routes_need_a_session(client):
+    response = client.get("/users/directory")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+    assert client.get("/users/directory", headers={"Authorization": "Bearer garbage"}).status_code == 401
+
+
+def test_non_ascii_token_is_rejected(client):
+    headers = {"Authorization": "Bearer caf\xe9.sign\xe9".encode("latin-1")}
+    assert client.get("/users/directory", headers=headers).status_code == 401
+
+
+def test_public_routes(client):
+    for path in ("/docs", "/redoc", "/openapi.json", "/metrics"):
+        assert client.get(path).status_code == 200, path
+
+    response = client.post("/users/", json={"username": "bob", "password": "pw", "role": "user"})
+    assert response.status_code == 200
+    assert client.post("/login", json={"username": "bob", "password": "nope"}).status_code == 401
+    assert client.get("/users/", params={"username": "bob", "password": "pw"}).json()["role"] == "user"
+
+
+def test_role_change_needs_an_admin(client):
+    user = login(client, "bob")
+    admin = login(client, "alice", "admin")
+
+    response = client.put("/users/bob/role", json={"role": "admin"}, headers=user)
+    assert response.status_code == 403
+
+    response = client.put("/users/bob/role", json={"role": "admin"}, headers=admin)
+    assert response.status_code == 200
+    # Tokens carrying the old role are revoked.
+    assert client.get("/users/directory", headers=user).status_code == 401
+
+
+def test_only_admins_assign_and_delete_tasks(client):
+    user = login(client, "bob")
+    admin = login(client, "alice", "admin")
+    task = {"title": "Report", "description": "Write it"}
+
+    assert client.post("/tasks/", params={"username": "bob"}, json=task, headers=user).status_code == 403
+    assert client.post("/tasks/bulk", json={"tasks": [dict(task, username="bob")]}, headers=user).status_code == 403
+    assert client.post("/tasks/", params={"username": "bob"}, json=task, headers=admin).status_code == 200
+    assert client.delete("/tasks/Report/", headers=user).status_code == 403
+    assert client.delete("/tasks/Report/", headers=admin).status_code == 200
+
+
+def test_users_change_only_their_own_tasks(backend, client):
+    bob = login(client, "bob")
+    carol = login(client, "carol")
+    admin = login(client, "alice", "admin")
+    for username in ("bob", "carol"):
+        client.post("/tasks/", params={"username": username}, json={"title": "Report", "description": ""},
+                    headers=admin)
+    bob_task = backend.db.fetch_task_id("bob", "Report")
+    carol_task = backend.db.fetch_task_id("carol", "Report")
+
+    url = f"/tasks/{bob_task}/status"
+    assert client.put(url, params={"new_status": "Completed"}, headers=carol).status_code == 403
+    assert client.put(url, params={"new_status": "Completed"}, headers=bob).status_code == 200
+    assert client.put(url, params={"new_status": "Pending"}, headers=admin).status_code == 200
+
+    updates = [{"task_id": bob_task, "status": "Completed"}, {"task_id": carol_task, "status": "Completed"}]
+    results = client.put("/tasks/status/batch", json={"updates": updates}, headers=bob).json()["results"]
+    assert [result["result"] for result in results] == ["applied", "forbidden"]
+    assert results[1]["task"] is None
+    assert backend.db.get_task(carol_task).status == "Pending"
+
+
+def test_listings_are_revalidated_with_etags(client):
+    admin = login(client, "alice", "admin")
+    login(client, "bob")
+    login(client, "carol")
+    client.post("/tasks/", params={"username": "bob"}, json={"title": "Report", "description": ""}, headers=admin)
+
+    first = client.get("/users/tasks/", headers=admin)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    response = client.get("/users/tasks/", headers={**admin, "If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+
+    bob = client.get("/tasks/", params={"username": "bob"}, headers=admin).headers["ETag"]
+    client.post("/tasks/", params={"username": "carol"}, json={"title": "Deploy", "description": ""}, headers=admin)
+
+    response = client.get("/users/tasks/", headers={**admin, "If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert "Deploy" in response.text
+    # Bob's tasks did not change, so his search keeps its ETag.
+    response = client.get("/tasks/", params={"username": "bob"}, headers={**admin, "If-None-Match": bob})
+    assert response.status_code == 304
+
+
+def test_title_search_matches_substrings_and_q_matches_prefixes(client):
+    admin = login(client, "alice", "admin")
+    login(client, "bob")
+    client.post("/tasks/", params={"username": "bob"}, json={"title": "Report", "description": ""}, headers=admin)
+
+    response = client.get("/tasks/", params={"username": "bob", "title": "port"}, headers=admin)
+    assert [task["title"] for task in response.json()["task"]] == ["Report"]
+    response = client.get("/tasks/", params={"username": "bob", "q": "port"}, headers=admin)
+    assert response.json()["task"] == []
+    response = client.get("/tasks/", params={"username": "bob", "q": "rep"}, headers=admin)
+    assert [task["title"] for task in response.json()["task"]] == ["Report"]
+
+
+def test_bulk_assignment_reports_each_task(client):
+    admin = login(client, "alice", "admin")
+    login(client, "bob")
+    tasks = [
+        {"username": "bob", "title": "Report", "description": "Write it"},
+        {"username": "bob", "title": "Report", "description": "Again"},
+        {"username": "nobody", "title": "Deploy", "description": ""},
+        {"username": "bob", "title": "Review", "description": "", "status": "Completed"},
+    ]
+    response = client.post("/tasks/bulk", json={"tasks": tasks}, headers=admin)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["summary"] == {"created": 2, "duplicate": 1, "user_not_found": 1}
+    assert [(item["index"], item["result"]) for item in body["results"]] == [
+        (0, "created"), (1, "duplicate"), (2, "user_not_found"), (3, "created")]
+    review = client.get("/tasks/", params={"username": "bob", "title": "Review"}, headers=admin).json()
+    assert review["task"][0]["status"] == "Completed"
+
+    response = client.post("/tasks/bulk", json={"tasks": [{"username": "bob"}]}, headers=admin)
+    assert response.status_code == 422
+
+
+def read_events(backend, client, monkeypatch, **kwargs):
+    """GET /events and return its events as (id, type, data) tuples."""
+    subscribe = backend.feed.subscribe
+
+    def subscribe_once(topics, since=None):
+        subscription, backlog = subscribe(topics, since)
+        subscription.overflowed = True  # Ends the stream after the backlog and hello
+        return subscription, backlog
+
+    monkeypatch.setattr(backend.feed, "subscribe", subscribe_once)
+    response = client.get("/events", **kwargs)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.split("\n\n"):
+        if block:
+            fields = dict(line.split(": ", 1) for line in block.split("\n"))
+            events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_event_stream_replays_missed_changes(backend, client, monkeypatch):
+    admin = login(client, "alice", "admin")
+    bob = login(client, "bob")
+    login(client, "carol")
+    since = backend.feed.last_seq
+    for username in ("bob", "carol"):
+        client.post("/tasks/", params={"username": username}, json={"title": "Report", "description": ""},
+                    headers=admin)
+
+    events = read_events(backend, client, monkeypatch, params={"since": since}, headers=bob)
+    assert [(event_type, data["username"]) for _, event_type, data in events[:-1]] == [("task_created", "bob")]
+    assert events[0][0] == events[0][2]["seq"] == since + 1
+    assert events[0][2]["task"]["title"] == "Report"
+    assert events[-1][1] == "hello" and events[-1][2]["topic"] == "user:bob"
+    assert events[-1][0] == backend.feed.last_seq
+
+    events = read_events(backend, client, monkeypatch, params={"topic": "all"},
+                         headers={**admin, "Last-Event-ID": str(since)})
+    assert [event_type for _, event_type, _ in events] == ["task_created", "task_created", "hello"]
+
+    assert client.get("/events", params={"topic": "all"}, headers=bob).status_code == 403
+
+
+def test_sync_returns_the_callers_changes_in_pages(client):
+    admin = login(client, "alice", "admin")
+    bob = login(client, "bob")
+    login(client, "carol")
+    since = client.get("/sync", params={"limit": 5000}, headers=bob).json()["version"]
+    for username, title in (("bob", "Report"), ("carol", "Deploy"), ("bob", "Review")):
+        client.post("/tasks/", params={"username": username}, json={"title": title, "description": ""},
+                    headers=admin)
+    client.delete("/tasks/Review/", headers=admin)
+
+    changes = client.get("/sync", params={"since": since}, headers=bob).json()
+    assert [task["title"] for task in changes["tasks"]] == ["Report"]
+    assert len(changes["deleted_tasks"]) == 1 and not changes["more"]
+    assert client.get("/sync", params={"since": changes["version"]}, headers=bob).json()["tasks"] == []
+
+    titles, version = [], since
+    while True:
+        page = client.get("/sync", params={"since": version, "limit": 1}, headers=admin).json()
+        titles += [task["title"] for task in page["tasks"]]
+        version = page["version"]
+        if not page["more"]:
+            break
+    assert titles == ["Report", "Deploy"]
+
+    assert client.get("/sync", params={"since": -1}, headers=bob).status_code == 422
+    assert client.get("/sync").status_code == 401
+
+
+def test_metrics_label_requests_by_route_template(backend, client):
+    admin = login(client, "alice", "admin")
+    client.post("/tasks/", params={"username": "alice"}, json={"title": "Report", "description": ""}, headers=admin)
+    task_id = backend.db.fetch_task_id("alice", "Report")
+    requests = backend.metrics.requests
+    status_route = ("PUT", "/tasks/{task_id}/status", "200")
+    before = requests.count(*status_route), requests.count("GET", "unmatched", "401")
+
+    client.put(f"/tasks/{task_id}/status", params={"new_status": "Completed"}, headers=admin)
+    client.get("/users/directory")  # Rejected before routing
+    assert (requests.count(*status_route), requests.count("GET", "unmatched", "401")) == (before[0] + 1, before[1] + 1)
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert f"/tasks/{task_id}/status" not in text
+    assert 'http_request_duration_seconds_count{method="PUT",route="/tasks/{task_id}/status",status="200"}' in text
+    assert 'route="unmatched",status="401"' in text
+    assert 'db_queries_total{method="update_task_status"}' in text
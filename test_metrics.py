@@ -0,0 +1,50 @@
+from database import Database
+from metrics import BackendMetrics, Histogram
+
+
+def test_database_calls_are_recorded_once_per_outer_method():
+    db = Database(":memory:")
+    calls = []
+    db.listeners.append(calls.append)
+    db.insert_user("bob", "hash", "user")
+    db.assign_task("bob", "Report", "Write it")
+    calls.clear()
+
+    db.check_user_credentials("bob", "wrong")  # Calls get_user_auth internally
+    db.assign_task("bob", "Review", "Read it")
+    db.close()
+
+    assert [call.method for call in calls] == ["check_user_credentials", "assign_task"]
+    assert calls[0].queries == 1 and calls[0].rows_written == 0
+    # Two lookups, BEGIN, the INSERT and COMMIT; the triggers' writes count as rows only.
+    assert calls[1].queries == 5
+    assert calls[1].rows_written > 1
+
+
+def test_render_prometheus_text():
+    db = Database(":memory:")
+    metrics = BackendMetrics(db)
+    token = metrics.start_request()
+    db.list_users()
+    metrics.observe_request(token, "GET", "/users/directory", 200, 0.02)
+    text = metrics.render()
+    db.close()
+
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/users/directory",status="200",le="0.025"} 1' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/users/directory",status="200"} 1' in text
+    assert 'db_queries_total{method="list_users"} 1' in text
+    assert 'db_pool_connections{state="max_size"} 1' in text
+    assert "# TYPE db_pool_waits_total counter" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.render()[2:] == [
+        'latency_bucket{le="0.1"} 1',
+        'latency_bucket{le="1"} 2',
+        'latency_bucket{le="+Inf"} 3',
+        "latency_sum 5.55",
+        "latency_count 3",
+    ]
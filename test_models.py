@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from database import Database
+from models import Task, User, dumps
+from responses import orjson_dumps, stdlib_dumps
+
+
+def test_dumps_leaves_out_fields_not_read():
+    task = Task(1, "bob", "Report", "Write it", "Pending")
+    assert json.loads(dumps({"task": [task]})) == {"task": [
+        {"task_id": 1, "username": "bob", "title": "Report", "description": "Write it", "status": "Pending"}]}
+    assert json.loads(dumps(User(2, "amy", "admin", []))) == {"user_id": 2, "username": "amy", "role": "admin",
+                                                              "tasks": []}
+    assert Task.from_dict(json.loads(dumps(task))) == task
+
+
+def test_user_with_tasks_groups_tasks_by_user():
+    db = Database(":memory:")
+    for username in ("bob", "amy"):
+        db.insert_user(username, "hash", "user")
+    db.assign_task("bob", "Report", "Write it")
+    db.assign_task("bob", "Review", "Read it")
+    users = db.user_with_tasks()
+    db.close()
+
+    assert [(user.username, [task.title for task in user.tasks]) for user in users] == [
+        ("amy", []), ("bob", ["Report", "Review"])]
+    assert not hasattr(users[1].tasks[0], "__dict__")
+
+
+def test_orjson_and_stdlib_paths_write_the_same_bytes():
+    pytest.importorskip("orjson")
+    content = {"users with tasks": [User(1, "zoë", "user", [Task(3, "zoë", "Café", "d", "Pending", 7)])],
+               "next_cursor": None, "rank": -1.5}
+    assert orjson_dumps(content) == stdlib_dumps(content)
@@ -0,0 +1,41 @@
+import time
+
+from notification import NotificationDispatcher, StubSink
+
+
+def test_burst_is_merged_into_a_summary():
+    sink = StubSink()
+    dispatcher = NotificationDispatcher(sink, window=0.1)
+    start = time.monotonic()
+    for i in range(500):
+        dispatcher.notify("user1", "task_created", "New task", f"task{i}")
+    assert time.monotonic() - start < 0.5  # Producers never wait for the sink
+
+    assert sink.delivered.wait(2)
+    dispatcher.close()
+    assert sink.sent == [("New tasks", "500 new tasks assigned")]
+
+
+def test_single_notification_is_shown_as_is():
+    sink = StubSink()
+    dispatcher = NotificationDispatcher(sink, window=0.01)
+    dispatcher.notify("user1", "task_created", "New task", "Write report")
+    dispatcher.notify("user2", "task_created", "New task", "Fix bug")
+    dispatcher.close()
+    assert sorted(sink.sent) == [("New task", "Fix bug"), ("New task", "Write report")]
+
+
+def test_rate_limit_holds_back_and_merges():
+    sink = StubSink()
+    dispatcher = NotificationDispatcher(sink, window=0.01, rate_limit=1, rate_period=0.5)
+    dispatcher.notify("user1", "task_updated", "Task updated", "first")
+    assert sink.delivered.wait(1)
+    time.sleep(0.05)
+    for i in range(3):
+        dispatcher.notify("user1", "task_updated", "Task updated", f"more{i}")
+        time.sleep(0.05)
+    assert len(sink.sent) == 1  # Still inside the rate period
+
+    time.sleep(0.6)
+    dispatcher.close()
+    assert sink.sent == [("Task updated", "first"), ("Tasks updated", "3 tasks updated")]
@@ -0,0 +1,69 @@
+import asyncio
+
+from database import Database
+from passwords import PasswordHasher, check_password, hash_password, is_bcrypt_hash, needs_rehash
+
+ROUNDS = 4  # bcrypt's minimum cost, to keep the tests fast
+
+
+def test_hash_and_check():
+    stored = hash_password("secret", rounds=ROUNDS)
+    assert is_bcrypt_hash(stored) and stored != "secret"
+    assert check_password("secret", stored)
+    assert not check_password("Secret", stored)
+
+
+def test_plain_text_passwords_still_check_but_need_rehash():
+    assert check_password("secret", "secret")
+    assert not check_password("secret", "other")
+    assert not check_password("secret", None)
+    assert needs_rehash("secret", rounds=ROUNDS)
+
+
+def test_needs_rehash_when_cost_changes():
+    stored = hash_password("secret", rounds=ROUNDS)
+    assert not needs_rehash(stored, rounds=ROUNDS)
+    assert needs_rehash(stored, rounds=ROUNDS + 1)
+
+
+def test_verify_cache_only_remembers_correct_passwords():
+    hasher = PasswordHasher(rounds=ROUNDS, workers=1)
+    stored = hash_password("secret", rounds=ROUNDS)
+
+    async def run():
+        assert await hasher.verify("bob", "secret", stored)
+        assert len(hasher._cache) == 1
+        assert await hasher.verify("bob", "secret", stored)  # From the cache
+        assert not await hasher.verify("bob", "wrong", stored)
+        assert not await hasher.verify("bob", "secret", hash_password("new", rounds=ROUNDS))
+        assert len(hasher._cache) == 1
+
+    try:
+        asyncio.run(run())
+    finally:
+        hasher.shutdown()
+
+
+def test_legacy_plain_text_password_is_upgraded():
+    hasher = PasswordHasher(rounds=ROUNDS, workers=1)
+    db = Database(":memory:")
+    db.insert_user("bob", "secret", "user")  # As stored before passwords were hashed
+
+    async def login(password):
+        # The steps start_session takes in the backend.
+        _, stored, _ = db.get_user_auth("bob")
+        if not await hasher.verify("bob", password, stored):
+            return False
+        if hasher.needs_rehash(stored):
+            db.update_password("bob", await hasher.hash(password))
+        return True
+
+    try:
+        assert asyncio.run(login("secret"))
+        stored = db.get_user_auth("bob")[1]
+        assert is_bcrypt_hash(stored) and not hasher.needs_rehash(stored)
+        assert db.check_user_credentials("bob", "secret")["role"] == "user"
+        assert not asyncio.run(login("wrong"))
+    finally:
+        hasher.shutdown()
+        db.close()
@@ -0,0 +1,46 @@
+import json
+
+from database import Database
+from query_log import SlowQueryLog, aggregate, normalize, read_entries
+
+
+def test_slow_statements_are_logged_with_method_and_plan(tmp_path):
+    path = str(tmp_path / "slow.log")
+    log = SlowQueryLog(path, threshold=0)
+    db = Database(":memory:", tracer=log)
+    db.insert_user("bob", "hash", "user")
+    db.assign_task("bob", "Report", "Write it")
+    db.search_task("bob", "Rep")
+    db.close()
+    log.close()
+
+    with open(path) as f:
+        entries = [json.loads(line) for line in f]
+    search = [entry for entry in entries if entry["method"] == "search_task"]
+    assert len(search) == 1
+    assert "username = ?" in search[0]["sql"]
+    assert not any(literal in entry["sql"] for entry in entries for literal in ("bob", "hash", "Rep"))
+    assert any("users" in detail for detail in search[0]["plan"])
+    assert any(entry["sql"] == "COMMIT" and entry["method"] == "assign_task" for entry in entries)
+
+
+def test_report_groups_statements_by_shape(tmp_path):
+    path = str(tmp_path / "slow.log")
+    entries = [
+        {"method": "search_task", "seconds": 0.2, "steps": 5000, "plan": ["SCAN tasks"],
+         "sql": "SELECT * FROM tasks WHERE title LIKE '%a%' AND user_id = 1"},
+        {"method": "search_task", "seconds": 0.4, "steps": 9000, "plan": ["SCAN tasks"],
+         "sql": "SELECT * FROM tasks WHERE title LIKE '%it''s%' AND user_id = 22"},
+        {"method": "get_task", "seconds": 0.1, "steps": 0, "plan": [], "sql": "SELECT 1"},
+    ]
+    with open(path + ".1", "w") as f:
+        f.write(json.dumps(entries[0]) + "\n")
+    with open(path, "w") as f:
+        f.write("".join(json.dumps(entry) + "\n" for entry in entries[1:]) + '{"cut sh')
+
+    report = aggregate(read_entries(path))
+    search = next(row for row in report if row["methods"] == ["search_task"])
+    assert search["sql"] == normalize(entries[0]["sql"]) == "SELECT * FROM tasks WHERE title LIKE ? AND user_id = ?"
+    assert search["count"] == 2
+    assert search["max"] == 0.4 and search["steps"] == 9000
+    assert len(report) == 2
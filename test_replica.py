@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from database import Database
+from models import dumps
+from replica import Replica
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "server.db"), pool_size=2)
+    database.insert_user("user1", "password1", "user")
+    database.assign_task("user1", "first", "test task")
+    database.assign_task("user1", "second", "test task")
+    yield database
+    database.close()
+
+
+def wire(value):
+    """``value`` as the client receives it from the backend."""
+    return json.loads(dumps(value))
+
+
+def sync(replica, db):
+    replica.apply(wire(db.changes_since(replica.version)))
+
+
+def flush(replica, db):
+    updates = replica.pending()
+    replica.resolve(updates, wire(db.update_task_statuses(updates)))
+
+
+def test_replica_survives_restart(db, tmp_path):
+    path = str(tmp_path / "replica.db")
+    replica = Replica(path)
+    sync(replica, db)
+    replica.queue_status(db.fetch_task_id("user1", "first"), "Completed")
+    replica.close()
+
+    replica = Replica(path)
+    assert [task["title"] for task in replica.tasks("user1")] == ["first", "second"]
+    assert replica.tasks()[0]["status"] == "Completed"
+    assert replica.pending_count() == 1
+
+
+def test_queued_change_is_shown_then_sent(db):
+    replica = Replica()
+    sync(replica, db)
+    task_id = db.fetch_task_id("user1", "first")
+
+    replica.queue_status(task_id, "In Progress")
+    replica.queue_status(task_id, "Completed")  # Collapses into one pending change
+    assert replica.pending_count() == 1
+    assert replica.tasks()[0] == dict(replica.tasks()[0], status="Completed", pending=True)
+
+    flush(replica, db)
+    assert replica.pending_count() == 0
+    assert db.get_task(task_id).status == "Completed"
+    assert replica.tasks()[0]["pending"] is False
+
+
+def test_server_wins_a_conflict(db):
+    replica = Replica()
+    sync(replica, db)
+    task_id = db.fetch_task_id("user1", "first")
+
+    replica.queue_status(task_id, "Completed")
+    db.update_task_status(task_id, "Blocked")  # Someone else changed it meanwhile
+    flush(replica, db)
+
+    assert db.get_task(task_id).status == "Blocked"
+    assert replica.tasks()[0]["status"] == "Blocked"
+    assert replica.pending_count() == 0
+
+
+def test_task_deleted_on_server(db):
+    replica = Replica()
+    sync(replica, db)
+    replica.queue_status(db.fetch_task_id("user1", "first"), "Completed")
+    db.delete_task("first")
+    flush(replica, db)
+
+    assert [task["title"] for task in replica.tasks()] == ["second"]
@@ -0,0 +1,25 @@
+from response_cache import GLOBAL_SCOPE, ResponseCache, etag_matches
+
+
+def test_writes_retire_only_affected_scopes():
+    cache = ResponseCache()
+    bob, amy = cache.user_scope("bob"), cache.user_scope("amy")
+    bob_etag, amy_etag, all_etag = cache.etag(bob), cache.etag(amy), cache.etag(GLOBAL_SCOPE)
+    cache.put("/tasks/?bob", bob_etag, b"bob")
+
+    cache.invalidate("amy")
+    assert cache.etag(bob) == bob_etag
+    assert cache.get("/tasks/?bob", cache.etag(bob)) == b"bob"
+    assert cache.etag(amy) != amy_etag
+    assert cache.etag(GLOBAL_SCOPE) != all_etag
+
+    cache.invalidate("bob")
+    assert cache.get("/tasks/?bob", cache.etag(bob)) is None
+
+
+def test_etag_matches():
+    assert etag_matches('"a-1"', '"a-1"')
+    assert etag_matches('"x", W/"a-1"', '"a-1"')
+    assert etag_matches("*", '"a-1"')
+    assert not etag_matches('"a-2"', '"a-1"')
+    assert not etag_matches(None, '"a-1"')
@@ -0,0 +1,49 @@
+from search_cache import PrefixSearchCache, normalize_query
+
+TASKS = [
+    {"title": "Report bug", "description": "Login crash"},
+    {"title": "Repaint office", "description": "Blue walls"},
+    {"title": "Write docs", "description": "Bug report workflow"},
+]
+
+
+def test_refinement_is_answered_from_complete_results():
+    cache = PrefixSearchCache()
+    cache.put("user1", "rep", TASKS)
+
+    assert cache.get("user1", "rep") == TASKS
+    assert cache.get("user1", "Repo") == [TASKS[0], TASKS[2]]
+    assert cache.get("user1", "rep bu") == [TASKS[0], TASKS[2]]
+    assert cache.get("user1", "rep wal") == [TASKS[1]]
+
+
+def test_misses_go_to_the_server():
+    cache = PrefixSearchCache()
+    cache.put("user1", "rep", TASKS)
+    cache.put("user1", "writ", TASKS[2:], complete=False)
+
+    assert cache.get("user1", "re") is None         # Broader than anything cached
+    assert cache.get("user2", "rep") is None        # Another user's results
+    assert cache.get("user1", "writ") == TASKS[2:]  # Exact repeat of a truncated result
+    assert cache.get("user1", "write") is None      # ...but never filtered
+
+
+def test_empty_query_answers_everything():
+    cache = PrefixSearchCache()
+    cache.put("user1", "", TASKS)
+    assert cache.get("user1", "crash") == [TASKS[0]]
+
+
+def test_entries_expire_and_are_bounded():
+    cache = PrefixSearchCache(max_entries=2, ttl=-1)
+    cache.put("user1", "a", TASKS)
+    assert cache.get("user1", "a") is None
+
+    cache = PrefixSearchCache(max_entries=2)
+    for query in ("a", "b", "c"):
+        cache.put("user1", query, TASKS)
+    assert cache.get("user1", "a") is None
+
+
+def test_normalize_query():
+    assert normalize_query("  Rep,  BUG! ") == "rep bug"
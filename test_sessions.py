@@ -0,0 +1,50 @@
+import pytest
+
+from sessions import InvalidToken, SessionManager
+
+
+@pytest.fixture
+def sessions():
+    return SessionManager(secret="test-secret", ttl=60, cache_size=2)
+
+
+def test_issued_token_validates(sessions):
+    token = sessions.issue(1, "user1", "admin")
+    session = sessions.validate(token)
+    assert (session.user_id, session.username, session.role) == (1, "user1", "admin")
+    assert sessions.validate(token) is session  # Served from the cache
+
+
+def test_forged_and_malformed_tokens_are_rejected(sessions):
+    token = sessions.issue(1, "user1", "user")
+    payload, _, signature = token.partition(".")
+    forged = SessionManager(secret="other").issue(1, "user1", "admin")
+
+    for bad in (forged, payload, f"{payload}x.{signature}", "garbage", f"{payload}.{signature[:-1]}é"):
+        with pytest.raises(InvalidToken):
+            sessions.validate(bad)
+
+
+def test_expired_token_is_rejected():
+    sessions = SessionManager(secret="test-secret", ttl=-1)
+    with pytest.raises(InvalidToken):
+        sessions.validate(sessions.issue(1, "user1", "user"))
+
+
+def test_revoke_user_invalidates_cached_tokens(sessions):
+    old = sessions.issue(1, "user1", "user")
+    other = sessions.issue(2, "user2", "user")
+    sessions.validate(old)
+
+    sessions.revoke_user(1)
+    with pytest.raises(InvalidToken):
+        sessions.validate(old)
+    assert sessions.validate(other).user_id == 2
+    assert sessions.validate(sessions.issue(1, "user1", "admin")).role == "admin"
+
+
+def test_cache_is_bounded(sessions):
+    tokens = [sessions.issue(i, f"user{i}", "user") for i in range(5)]
+    for token in tokens:
+        sessions.validate(token)
+    assert len(sessions._cache) == 2
@@ -1,11 +0,0 @@
-class Users: 
-    def __init__(self, name, password ):
-        self.name = name
-        self.password = password
-        
-        
-    # def insert_user(self,database ,user ) :
-    #     self.insert_user(database, user)
-        
-            
-        
\ No newline at end of file
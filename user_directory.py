@@ -0,0 +1,61 @@
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
+
+
+class UserDirectory(QStandardItemModel):
+    """Client-side list of users, shared as the model of every user picker.
+
+    The directory is fetched once; afterwards admin actions update it in
+    place, so the pickers stay current without another round trip.
+    """
+
+    RoleRole = Qt.ItemDataRole.UserRole + 1
+    UserIdRole = Qt.ItemDataRole.UserRole + 2
+
+    loaded = pyqtSignal()
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, api, runner, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.runner = runner
+
+    def load(self):
+        """Fetch the whole directory in the background."""
+        self.runner.submit(
+            "user_directory", self.api.list_users,
+            on_result=self._reset, on_error=lambda e: self.load_failed.emit(str(e)),
+        )
+
+    def _reset(self, users):
+        self.clear()
+        for user in users:
+            self.add_user(user["username"], user["role"], user.get("user_id"))
+        self.loaded.emit()
+
+    def _row_of(self, username):
+        matches = self.findItems(username, Qt.MatchFlag.MatchExactly)
+        return matches[0].row() if matches else None
+
+    def add_user(self, username, role, user_id=None):
+        item = QStandardItem(username)
+        item.setData(role, self.RoleRole)
+        item.setData(user_id, self.UserIdRole)
+        self.appendRow(item)
+
+    def remove_user(self, username):
+        row = self._row_of(username)
+        if row is not None:
+            self.removeRow(row)
+
+    def set_role(self, username, role):
+        row = self._row_of(username)
+        if row is not None:
+            self.item(row).setData(role, self.RoleRole)
+
+    def role_of(self, username):
+        row = self._row_of(username)
+        return self.item(row).data(self.RoleRole) if row is not None else None
+
+    def usernames(self):
+        return [self.item(row).text() for row in range(self.rowCount())]
@@ -1,11 +1,24 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QListWidget
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QListWidget, QListWidgetItem, QMessageBox
+from PyQt6.QtCore import Qt, QTimer
 from api_client import APIClient
+from workers import EventStream, api_runner
+from notification import dispatcher
 
 class UserWindow(QWidget):
-    def __init__(self, username):
+    """A user's tasks, read from the local replica so the window works offline.
+
+    Changes are applied to the replica at once and sent in the background;
+    pushed events and the refresh button bring the replica up to date.
+    """
+
+    SYNC_DELAY_MS = 300      # Lets a burst of clicks or events share one round trip
+    RETRY_MS = 10_000        # How often to retry while changes are waiting offline
+
+    def __init__(self, username, api=None):
         super().__init__()
-        self.api = APIClient()
+        self.api = api or APIClient()
+        self.runner = api_runner()
+        self.username = username
         self.setWindowTitle(f"Dashboard {username}")  # "Dashboard" in Persian
         self.resize(500, 400)
 
@@ -45,23 +58,93 @@ class UserWindow(QWidget):
         layout.setSpacing(15)
 
         # Header Label
-        header_label = QLabel("You're Tasks")  # "Your Tasks" in Persian
+        self.header_label = QLabel("You're Tasks")  # "Your Tasks" in Persian
         # header_label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-        layout.addWidget(header_label)
+        layout.addWidget(self.header_label)
 
         # Task List
         self.task_list = QListWidget()
         layout.addWidget(self.task_list)
 
         # Buttons
-        refresh_button = QPushButton("Refresh Tasks")  # "Refresh Tasks" in Persian
-        complete_button = QPushButton("Marked as Complete")  # "Mark as Complete" in Persian
-        layout.addWidget(refresh_button)
-        layout.addWidget(complete_button)
+        self.refresh_button = QPushButton("Refresh Tasks")  # "Refresh Tasks" in Persian
+        self.refresh_button.clicked.connect(self.load_tasks)
+        self.complete_button = QPushButton("Marked as Complete")  # "Mark as Complete" in Persian
+        self.complete_button.clicked.connect(self.complete_selected_task)
+        layout.addWidget(self.refresh_button)
+        layout.addWidget(self.complete_button)
 
         self.setLayout(layout)
+
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.timeout.connect(self.sync_now)
+
+        self.show_tasks()  # Whatever the replica has from last time, before any network call
         self.load_tasks()
 
+        # Changes made elsewhere are pushed to us, so the list never needs polling.
+        self.events = EventStream(self.api, topic=f"user:{username}")
+        self.events.event_received.connect(self.schedule_sync)
+        self.events.event_received.connect(self.notify_event)
+        self.events.connected.connect(self.schedule_sync)  # Catch up after reconnecting
+        self.events.start()
+
+    def notify_event(self, event):
+        # Handed to the dispatcher, which merges bursts such as a bulk assignment.
+        # Status updates are left out: most of them are the user's own.
+        titles = {"task_created": "New task", "task_deleted": "Task removed"}
+        if event["type"] in titles:
+            dispatcher().notify(self.username, event["type"], titles[event["type"]], event["task"]["title"])
+
     def load_tasks(self):
+        self.refresh_button.setEnabled(False)
+        self.sync_now()
+
+    def schedule_sync(self, *_):
+        self.sync_timer.start(self.SYNC_DELAY_MS)
+
+    def sync_now(self):
+        self.runner.submit(
+            ("replica_sync", id(self.api)), self.api.refresh,
+            on_result=self.on_synced, on_error=self.on_sync_error,
+        )
+
+    def on_synced(self, online):
+        self.refresh_button.setEnabled(True)
+        self.header_label.setText("You're Tasks" if online else "You're Tasks (offline)")
+        self.show_tasks()
+        if self.api.replica.pending_count():
+            # Offline, or a change was queued while the last batch was in flight.
+            self.sync_timer.start(self.RETRY_MS if not online else self.SYNC_DELAY_MS)
+
+    def on_sync_error(self, error):
+        self.refresh_button.setEnabled(True)
+        QMessageBox.warning(self, "Error", f"Could not load tasks: {error}")
+
+    def show_tasks(self):
+        selected = self.task_list.currentItem()
+        selected_id = selected.data(Qt.ItemDataRole.UserRole) if selected else None
+
+        self.task_list.clear()
+        for task in self.api.replica.tasks(self.username):
+            marker = " (saving...)" if task["pending"] else ""
+            item = QListWidgetItem(f"{task['title']} - {task['description']} [{task['status']}]{marker}")
+            item.setData(Qt.ItemDataRole.UserRole, task["task_id"])
+            self.task_list.addItem(item)
+            if task["task_id"] == selected_id:
+                self.task_list.setCurrentItem(item)
+
+    def complete_selected_task(self):
+        item = self.task_list.currentItem()
+        if item is None:
+            QMessageBox.warning(self, "Error", "Select a task first.")
+            return
+        # Queued in the replica, so the list shows it straight away; sent shortly after.
+        self.api.update_task_status(item.data(Qt.ItemDataRole.UserRole), "Completed")
+        self.show_tasks()
+        self.schedule_sync()
 
-         pass
+    def closeEvent(self, event):
+        self.events.stop()
+        super().closeEvent(event)
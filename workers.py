@@ -0,0 +1,164 @@
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThread, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class _WorkerSignals(QObject):
+    # key, result, error
+    done = pyqtSignal(object, object, object)
+
+
+class _Worker(QRunnable):
+    """Run one blocking call on a pool thread and report back through a signal."""
+
+    def __init__(self, key, fn, args, kwargs):
+        super().__init__()
+        self.setAutoDelete(False)  # The runner owns the worker until it reports back
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = _WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.done.emit(self.key, None, e)
+        else:
+            self.signals.done.emit(self.key, result, None)
+
+
+class ApiRunner(QObject):
+    """Run API calls off the UI thread and deliver the results on it.
+
+    ``submit`` coalesces calls by key: while a call for a key is in flight,
+    further submissions for the same key only add their callbacks to it.
+    ``submit_latest`` is for calls that supersede each other, such as a search
+    being retyped: a newer call on the same channel drops the results of
+    older ones and takes them off the queue if they have not started yet.
+    """
+
+    def __init__(self, parent=None, max_threads=4):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._inflight = {}   # key -> (worker, [(on_result, on_error), ...])
+        self._latest = {}     # channel -> newest generation
+
+    def submit(self, key, fn, *args, on_result=None, on_error=None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the background unless ``key`` is already running."""
+        if key in self._inflight:
+            self._inflight[key][1].append((on_result, on_error))
+            return False
+
+        worker = _Worker(key, fn, args, kwargs)
+        # The runner lives on the UI thread, so this connection is queued there.
+        worker.signals.done.connect(self._deliver)
+        self._inflight[key] = (worker, [(on_result, on_error)])
+        self.pool.start(worker)
+        return True
+
+    def submit_latest(self, channel, fn, *args, on_result=None, on_error=None, **kwargs):
+        """Run a call whose results are only wanted if nothing newer was submitted on ``channel``."""
+        generation = self._latest.get(channel, 0) + 1
+        self.cancel(channel)
+        self._latest[channel] = generation
+
+        def if_current(callback):
+            if callback is None:
+                return None
+
+            def deliver(value):
+                if self._latest.get(channel) == generation:
+                    callback(value)
+            return deliver
+
+        return self.submit((channel, generation), fn, *args,
+                           on_result=if_current(on_result), on_error=if_current(on_error), **kwargs)
+
+    def cancel(self, channel):
+        """Drop the results of the pending call on ``channel``, unqueueing it if it hasn't started."""
+        generation = self._latest.get(channel)
+        if generation is None:
+            return
+        self._latest[channel] = generation + 1  # Any late result is now stale
+
+        key = (channel, generation)
+        entry = self._inflight.get(key)
+        if entry and self.pool.tryTake(entry[0]):
+            del self._inflight[key]
+
+    def is_running(self, key):
+        return key in self._inflight
+
+    @pyqtSlot(object, object, object)
+    def _deliver(self, key, result, error):
+        _worker, callbacks = self._inflight.pop(key, (None, []))
+        for on_result, on_error in callbacks:
+            if error is None:
+                if on_result is not None:
+                    on_result(result)
+            elif on_error is not None:
+                on_error(error)
+
+
+class EventStream(QThread):
+    """Follow the backend's task change stream and re-emit each event as a signal.
+
+    Reconnects with exponential backoff when the connection drops, resuming
+    from the last sequence number seen so no change is missed.
+    """
+
+    event_received = pyqtSignal(dict)
+    connected = pyqtSignal(bool)
+
+    def __init__(self, api, topic=None, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.topic = topic
+        self.last_seq = None
+        self._stopping = threading.Event()
+        self._response = None
+
+    def run(self):
+        backoff = 1
+        while not self._stopping.is_set():
+            try:
+                self._response = self.api.open_event_stream(self.topic, self.last_seq)
+                with self._response:
+                    for event in self.api.iter_events(self._response):
+                        if event["type"] == "reset":
+                            self.last_seq = event["seq"]  # May be lower, after a server restart
+                        else:
+                            self.last_seq = max(self.last_seq or 0, event["seq"])
+                        if event["type"] == "hello":
+                            self.connected.emit(True)
+                            backoff = 1
+                        else:
+                            self.event_received.emit(event)
+            except Exception:
+                if self._stopping.is_set():
+                    return
+            self.connected.emit(False)
+            self._stopping.wait(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def stop(self):
+        """Close the stream and wait for the thread to finish."""
+        self._stopping.set()
+        response = self._response
+        if response is not None:
+            response.close()  # Unblocks the read in run()
+        self.wait()
+
+
+_runner = None
+
+
+def api_runner():
+    """The ApiRunner shared by every window. Needs a running QApplication."""
+    global _runner
+    if _runner is None:
+        _runner = ApiRunner()
+    return _runner